@@ -2,27 +2,23 @@
 Vercel serverless function entrypoint for FastAPI
 """
 import sys
-import os
 from pathlib import Path
 
-# Add project root to path
+# Add project root to path (the only sys.path change; backend modules rely on it)
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
-# Set PYTHONPATH for imports
-os.environ['PYTHONPATH'] = str(project_root)
+# Import FastAPI app (importing the module also configures logging and
+# warms the RAG pipeline)
+from backend.api.main import app
 
 # Log current working directory and paths for debugging
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-logger.info(f"Project root: {project_root}")
-logger.info(f"Current working directory: {Path.cwd()}")
-logger.info(f"Public directory exists: {(project_root / 'public').exists()}")
-
-# Import FastAPI app
-from backend.api.main import app
+logger.info("Project root: %s", project_root)
+logger.info("Current working directory: %s", Path.cwd())
+logger.info("Public directory exists: %s", (project_root / 'public').exists())
 
 # Export the app for Vercel
 __all__ = ['app']
-
@@ -1,58 +1,199 @@
 """
 FastAPI Backend for Mutual Fund FAQ Bot
 """
-import sys
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Callable, Dict, Any, List, Tuple, TYPE_CHECKING
+import asyncio
+import functools
+import atexit
+import contextlib
+import gzip
+import hashlib
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+
+from backend.llm.gemini_client import GeminiKeyMissingError
+from backend.rag.query_cache import QueryCache
+from backend.api.models import (
+    QueryRequest, QueryResponse, FundsResponse, 
+    HealthResponse, ErrorResponse
+)
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# RAGPipeline (and its transitive imports) is imported lazily in get_rag_pipeline()
+if TYPE_CHECKING:
+    from backend.rag.rag_pipeline import RAGPipeline
 
 try:
-    from fastapi import FastAPI, HTTPException, Query
-    from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import JSONResponse, FileResponse
-    from fastapi.staticfiles import StaticFiles
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    # Fallback if FastAPI not installed
-    print("FastAPI not installed. Please install: pip install fastapi uvicorn")
-    sys.exit(1)
-
-from backend.api.models import (
-    QueryRequest, QueryResponse, FundsResponse, 
-    HealthResponse, ErrorResponse, SourceInfo
-)
-from backend.rag.rag_pipeline import RAGPipeline
+    HAS_ORJSON = False
 
-# Setup logging
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# orjson serializes in C; fall back to stdlib json if it's not installed
+DefaultJSONResponse = ORJSONResponse if HAS_ORJSON else JSONResponse
+
+# Setup logging: handlers only enqueue records, and a background listener
+# thread does the stderr writes so request handlers never block on log I/O
+_log_queue = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+# QueueHandler.prepare() bakes its own formatting into the message; keep it to
+# the bare message so the stream handler adds the prefix only once
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+# LOG_LEVEL overrides the default: WARNING on Vercel, INFO elsewhere
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING" if "VERCEL" in os.environ else "INFO").upper()
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s'
+    level=LOG_LEVEL,
+    handlers=[_log_queue_handler]
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Make sure the RAG pipeline is initialized and warm before serving
+    (traditional deployments). A misconfigured worker fails startup instead
+    of answering every query with 503.
+    """
+    warmed_at_import = rag_pipeline is not None
+    pipeline = await get_rag_pipeline_async()
+    if pipeline is None:
+        raise RuntimeError(f"RAG pipeline failed to initialize: {rag_init_error}")
+    if not warmed_at_import:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(rag_executor, pipeline.warm_up)
+    yield
+    if rag_pipeline is not None:
+        rag_pipeline.gemini_client.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Mutual Fund FAQ Bot API",
     description="API for querying mutual fund information using RAG",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
+# The bundled frontend is served from the same origin, so CORS only matters for
+# the standalone dev frontend (frontend/serve.py) or origins listed in
+# CORS_ALLOWED_ORIGINS (comma-separated). No cookies are used, so no credentials.
+ALLOWED_ORIGINS = frozenset(
+    origin.strip()
+    for origin in os.getenv(
+        "CORS_ALLOWED_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000"
+    ).split(",")
+    if origin.strip()
+)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=sorted(ALLOWED_ORIGINS),
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress JSON answers (multi-KB LLM prose) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Optional per-phase latency breakdown in a Server-Timing response header
+# (dev/staging only): set ENABLE_SERVER_TIMING=1 and
+# pip install asgi-server-timing-middleware
+if os.getenv("ENABLE_SERVER_TIMING"):
+    try:
+        from asgi_server_timing import ServerTimingMiddleware
+        from backend.rag.rag_pipeline import RAGPipeline as _RAGPipeline
+        from backend.rag.embedding_store import EmbeddingStore
+
+        app.add_middleware(
+            ServerTimingMiddleware,
+            calls_to_track={
+                "1embed": (EmbeddingStore.generate_embedding,),
+                "2retrieve": (_RAGPipeline._hybrid_search,),
+                "3llm": (_RAGPipeline._generate_answer, _RAGPipeline._generate_general_finance_answer),
+                "4render": (DefaultJSONResponse.render,),
+            }
+        )
+        logger.info("Server-Timing middleware enabled")
+    except ImportError:
+        logger.warning("ENABLE_SERVER_TIMING is set but asgi-server-timing-middleware is not installed")
+
 # Global RAG pipeline instance
-rag_pipeline: Optional[RAGPipeline] = None
+rag_pipeline: Optional["RAGPipeline"] = None
 rag_init_error: Optional[str] = None  # Store initialization error for better error messages
 
+# Micro-cache of serialized JSON bodies for frequently polled endpoints
+# (/api/schemes, /api/health), keyed by endpoint name -> (created_at, body)
+RESPONSE_CACHE_TTL = 30.0
+_response_cache: Dict[str, Tuple[float, bytes]] = {}
+
+# Answers for repeated questions (e.g. the welcome-screen examples), so they
+# skip retrieval and the Gemini call
+query_cache = QueryCache(maxsize=256, ttl=3600.0)
+
+
+def _resolve_data_dirs() -> Tuple[Optional[Path], Optional[Path]]:
+    """
+    Locate the scraped data and embeddings directories (works in both local and Vercel)
+    
+    Returns:
+        (data_dir, embeddings_dir), or (None, None) if no data directory exists
+    """
+    data_dir = project_root / "data" / "scraped"
+    embeddings_dir = project_root / "data" / "embeddings"
+    
+    # Log paths for debugging
+    logger.info("Project root: %s", project_root)
+    logger.info("Data directory: %s (exists: %s)", data_dir, data_dir.exists())
+    logger.info("Embeddings directory: %s (exists: %s)", embeddings_dir, embeddings_dir.exists())
+    
+    if data_dir.exists():
+        return data_dir, embeddings_dir
+    
+    logger.warning("Data directory not found at %s, trying alternative paths...", data_dir)
+    alt_paths = [
+        Path.cwd() / "data" / "scraped",
+        Path("/var/task/data/scraped"),  # Vercel serverless
+        Path("/tmp/data/scraped"),  # Alternative serverless
+    ]
+    for alt_path in alt_paths:
+        if alt_path.exists():
+            logger.info("Using alternative data directory: %s", alt_path)
+            return alt_path, alt_path.parent / "embeddings"
+    logger.error("Data directory not found in %s or alternatives", data_dir)
+    return None, None
+
+
+# Resolved once at import; the deployment layout doesn't change at runtime
+project_root = Path(__file__).parent.parent.parent
+_DATA_DIR, _EMBEDDINGS_DIR = _resolve_data_dirs()
+
 
 # Initialize RAG pipeline (lazy initialization for serverless)
 def get_rag_pipeline():
@@ -67,119 +208,112 @@ def get_rag_pipeline():
                 error_msg = "GEMINI_API_KEY environment variable not set. Please configure it in Vercel project settings under Environment Variables."
                 logger.error(error_msg)
                 rag_init_error = error_msg
-                raise ValueError(error_msg)
-            
-            # Determine data directory path (works in both local and Vercel)
-            project_root = Path(__file__).parent.parent.parent
-            data_dir = project_root / "data" / "scraped"
-            embeddings_dir = project_root / "data" / "embeddings"
-            
-            # Log paths for debugging
-            logger.info(f"Project root: {project_root}")
-            logger.info(f"Data directory: {data_dir} (exists: {data_dir.exists()})")
-            logger.info(f"Embeddings directory: {embeddings_dir} (exists: {embeddings_dir.exists()})")
+                raise GeminiKeyMissingError(error_msg)
             
-            # Check if data directory exists
-            if not data_dir.exists():
-                logger.warning(f"Data directory not found at {data_dir}, trying alternative paths...")
-                # Try alternative paths
-                alt_paths = [
-                    Path.cwd() / "data" / "scraped",
-                    Path("/var/task/data/scraped"),  # Vercel serverless
-                    Path("/tmp/data/scraped"),  # Alternative serverless
-                ]
-                for alt_path in alt_paths:
-                    if alt_path.exists():
-                        data_dir = alt_path
-                        embeddings_dir = alt_path.parent / "embeddings"
-                        logger.info(f"Using alternative data directory: {data_dir}")
-                        break
-                else:
-                    error_msg = f"Data directory not found. Tried: {data_dir} and alternatives. Please ensure data files are included in deployment."
-                    logger.error(error_msg)
-                    rag_init_error = error_msg
-                    raise FileNotFoundError(error_msg)
+            if _DATA_DIR is None:
+                error_msg = f"Data directory not found. Tried: {project_root / 'data' / 'scraped'} and alternatives. Please ensure data files are included in deployment."
+                logger.error(error_msg)
+                rag_init_error = error_msg
+                raise FileNotFoundError(error_msg)
             
+            from backend.rag.rag_pipeline import RAGPipeline
             rag_pipeline = RAGPipeline(
-                data_dir=str(data_dir),
-                embeddings_dir=str(embeddings_dir)
+                data_dir=str(_DATA_DIR),
+                embeddings_dir=str(_EMBEDDINGS_DIR)
             )
-            logger.info(f"RAG pipeline initialized successfully with {len(rag_pipeline.chunks)} chunks")
+            logger.info("RAG pipeline initialized successfully with %d chunks", len(rag_pipeline.chunks))
             rag_init_error = None  # Clear error on success
+            _response_cache.clear()  # Drop responses built from the previous pipeline
+            query_cache.clear()
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error initializing RAG pipeline: {e}", exc_info=True)
+            logger.error("Error initializing RAG pipeline: %s", e, exc_info=True)
             # Store more specific error message
-            if "GEMINI_API_KEY" in error_msg or "Gemini API key" in error_msg:
+            if isinstance(e, GeminiKeyMissingError):
                 rag_init_error = "Gemini API key is missing or invalid. Please set GEMINI_API_KEY in Vercel environment variables."
-            elif "Data directory" in error_msg or "not found" in error_msg:
+            elif isinstance(e, FileNotFoundError):
                 rag_init_error = "Data files not found. Please ensure scraped data is included in the deployment."
             else:
-                rag_init_error = f"Failed to initialize RAG pipeline: {error_msg}"
+                rag_init_error = f"Failed to initialize RAG pipeline: {e}"
             rag_pipeline = None
     return rag_pipeline
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize RAG pipeline on startup (for traditional deployments)"""
-    get_rag_pipeline()
+# Bounded worker pool for blocking RAG work (pipeline init and queries), so the
+# event loop keeps serving cheap endpoints like /api/health during a query
+RAG_WORKER_THREADS = int(os.getenv("RAG_WORKER_THREADS", min(8, (os.cpu_count() or 1) + 4)))
+rag_executor = ThreadPoolExecutor(max_workers=RAG_WORKER_THREADS, thread_name_prefix="rag")
+_rag_init_lock = threading.Lock()
 
-# Load frontend files for Vercel serverless deployment
-# Try to load from public directory (works in local dev), fall back to reading at runtime
+
+def _get_rag_pipeline_locked():
+    """Serialize (re-)initialization so concurrent requests don't build it twice"""
+    with _rag_init_lock:
+        return get_rag_pipeline()
+
+
+async def get_rag_pipeline_async():
+    """Get RAG pipeline, running a pending (re-)initialization off the event loop"""
+    if rag_pipeline is not None:
+        return rag_pipeline
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(rag_executor, _get_rag_pipeline_locked)
+
+async def require_rag_pipeline() -> "RAGPipeline":
+    """
+    Return the RAG pipeline for a request handler, or fail the request with 503
+    
+    Returns:
+        Initialized RAGPipeline
+        
+    Raises:
+        HTTPException: 503 with the initialization error if the pipeline isn't available
+    """
+    pipeline = await get_rag_pipeline_async()
+    if pipeline is None:
+        raise HTTPException(
+            status_code=503,
+            detail=rag_init_error or "RAG pipeline not initialized. Please check server logs."
+        )
+    return pipeline
+
+# Initialize and warm the RAG pipeline at import time so serverless cold starts
+# pay the init cost during the platform init phase (and land in the container
+# snapshot) instead of inside the first request.
+# require_rag_pipeline() in the handlers stays as a fallback to retry after failure.
 try:
-    project_root = Path(__file__).parent.parent.parent
-    public_path = project_root / "public"
-    logger.info(f"Project root: {project_root}, Public path: {public_path}, Exists: {public_path.exists()}")
+    if get_rag_pipeline() is not None:
+        rag_pipeline.warm_up()
 except Exception as e:
-    logger.error(f"Error setting up paths: {e}")
-    project_root = Path.cwd()
-    public_path = project_root / "public"
-
-def load_frontend_file(filename: str) -> str:
-    """Load frontend file from public directory - tries multiple paths for Vercel"""
-    # Try multiple possible paths
-    possible_paths = [
-        public_path / filename,  # Standard path
-        project_root / "public" / filename,  # Explicit project root
-        Path.cwd() / "public" / filename,  # Current working directory
-        Path(__file__).parent.parent.parent / "public" / filename,  # From this file
-    ]
-    
-    for file_path in possible_paths:
-        abs_path = file_path.resolve() if file_path.exists() else file_path
-        if file_path.exists():
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if content:
-                        logger.info(f"Successfully loaded {filename} from {abs_path} ({len(content)} chars)")
-                        return content
-                    else:
-                        logger.warning(f"File {filename} at {abs_path} is empty")
-            except Exception as e:
-                logger.warning(f"Error reading {filename} from {abs_path}: {e}")
-                continue
-    
-    logger.error(f"Could not load {filename} from any path. Tried: {[str(p.resolve() if p.exists() else p) for p in possible_paths]}")
-    return ""
+    logger.error("Error warming RAG pipeline at import: %s", e)
 
-# Generate HTML with embedded frontend files
-def generate_frontend_html(app_jsx_content: str, styles_css_content: str) -> str:
-    """Generate HTML with embedded JSX and CSS"""
-    # Escape for HTML/JavaScript - need to escape script tags and handle special chars
-    def escape_for_html(s):
-        # Escape script closing tags to prevent breaking out of script tag
-        s = s.replace('</script>', '<\\/script>')
-        # Escape backslashes
-        s = s.replace('\\', '\\\\')
-        return s
-    
-    app_jsx_escaped = escape_for_html(app_jsx_content)
-    styles_css_escaped = escape_for_html(styles_css_content)
-    
-    # Use string concatenation instead of .format() to avoid conflicts with CSS/JSX curly braces
-    html_parts = [
-        """<!DOCTYPE html>
+# Load frontend files for Vercel serverless deployment
+# The public directory is known up front: Vercel always deploys it to
+# /var/task/public, locally it sits next to backend/. No path probing needed.
+public_path = Path("/var/task/public") if "VERCEL" in os.environ else project_root / "public"
+try:
+    _public_files = set(os.listdir(public_path))
+except OSError:
+    _public_files = set()
+_missing_public_files = {"app.jsx", "styles.css"} - _public_files
+logger.info("Project root: %s, Public path: %s", project_root, public_path)
+if _missing_public_files:
+    logger.warning("Missing in %s: %s; using embedded copies", public_path, sorted(_missing_public_files))
+
+# Resolved once at import; None means the file is not deployed
+RESOLVED_JSX_PATH = public_path / "app.jsx" if "app.jsx" in _public_files else None
+RESOLVED_CSS_PATH = public_path / "styles.css" if "styles.css" in _public_files else None
+RESOLVED_JS_PATH = public_path / "app.js" if "app.js" in _public_files else None
+
+def _read(path: Optional[Path]) -> str:
+    """Read a resolved frontend file, or return "" if it was not found at startup"""
+    if path is None:
+        return ""
+    content = path.read_bytes().decode('utf-8')
+    logger.info("Loaded %s (%d chars)", path, len(content))
+    return content
+
+# Page template pieces around the inlined CSS and app script. Plain strings
+# concatenated by generate_frontend_html(), so CSS/JSX curly braces need no escaping.
+_HTML_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -211,25 +345,46 @@ def generate_frontend_html(app_jsx_content: str, styles_css_content: str) -> str
             padding: 20px;
         }
     </style>
-    <style id="app-styles">""",
-        styles_css_escaped,
-        """</style>
+    <style id="app-styles">"""
+
+_HTML_MID = """</style>
 </head>
 <body>
     <div id="root"></div>
     <script crossorigin src="https://unpkg.com/react@18/umd/react.production.min.js"></script>
     <script crossorigin src="https://unpkg.com/react-dom@18/umd/react-dom.production.min.js"></script>
-    <script src="https://unpkg.com/@babel/standalone/babel.min.js"></script>
+"""
+
+_HTML_PLAIN_SCRIPT = """    <script>
+"""
+
+_HTML_BABEL_SCRIPT = """    <script src="https://unpkg.com/@babel/standalone/babel.min.js"></script>
     <script type="text/babel">
-""",
-        app_jsx_escaped,
-        """
+"""
+
+_HTML_TAIL = """
     </script>
 </body>
 </html>"""
-    ]
+
+# Generate HTML with embedded frontend files
+def generate_frontend_html(app_jsx_content: str, styles_css_content: str,
+                           precompiled: bool = False) -> str:
+    """Generate HTML with embedded JSX (or precompiled JS) and CSS"""
+    # Script and style contents are raw text in HTML: backslashes and other
+    # escapes must reach the browser untouched (doubling them would turn '\\n'
+    # in the app's code into a literal backslash-n). Only a closing script tag
+    # has to be broken up so it can't end the element early.
+    def escape_for_html(s):
+        return s.replace('</script>', '<\\/script>') if '</script>' in s else s
+    
+    app_jsx_escaped = escape_for_html(app_jsx_content)
+    styles_css_escaped = escape_for_html(styles_css_content)
+    
+    # Precompiled JS runs directly; raw JSX needs Babel Standalone in the browser
+    app_script_tags = _HTML_PLAIN_SCRIPT if precompiled else _HTML_BABEL_SCRIPT
     
-    return ''.join(html_parts)
+    return f"{_HTML_HEAD}{styles_css_escaped}{_HTML_MID}{app_script_tags}{app_jsx_escaped}{_HTML_TAIL}"
 
 # Embedded frontend files (always available, no file system dependency)
 # These are embedded directly to work in Vercel serverless environment
@@ -333,11 +488,35 @@ function LoadingBubble() {
     );
 }
 
+// Read a server-sent event stream, calling onEvent(eventName, data) for each event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\\n\\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+            let eventName = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\\n')) {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onEvent(eventName, JSON.parse(data));
+        }
+    }
+}
+
 // Main Chat Component
 function ChatApp() {
     const [messages, setMessages] = useState([]);
     const [inputValue, setInputValue] = useState('');
     const [isLoading, setIsLoading] = useState(false);
+    const [isStreaming, setIsStreaming] = useState(false);
     const messagesEndRef = useRef(null);
     const inputRef = useRef(null);
 
@@ -362,10 +541,11 @@ function ChatApp() {
         setMessages(prev => [...prev, { text: question, isUser: true }]);
         setInputValue('');
         setIsLoading(true);
+        let streamingStarted = false;
 
         try {
-            // Call API
-            const response = await fetch(`${API_BASE_URL}/api/query`, {
+            // Call API; the answer streams back as server-sent events
+            const response = await fetch(`${API_BASE_URL}/api/query/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -373,28 +553,70 @@ function ChatApp() {
                 body: JSON.stringify({ question: question }),
             });
 
-            if (!response.ok) {
-                // Try to extract error message from response
-                let errorDetail = 'API request failed';
-                try {
-                    const errorData = await response.json();
-                    errorDetail = errorData.detail || errorData.error || errorData.message || errorDetail;
-                } catch (e) {
-                    // If JSON parsing fails, use status text
-                    errorDetail = response.statusText || errorDetail;
+            let data = null;
+            let sawEvent = false;
+            if (response.ok && response.body) {
+                await readEventStream(response, (eventName, payload) => {
+                    sawEvent = true;
+                    if (eventName === 'error') {
+                        throw new Error(payload.detail || 'API request failed');
+                    }
+                    if (eventName === 'done') {
+                        data = payload;
+                        return;
+                    }
+                    // Grow the assistant bubble as text arrives
+                    if (!streamingStarted) {
+                        streamingStarted = true;
+                        setIsStreaming(true);
+                        setMessages(prev => [...prev, { text: payload.delta, isUser: false }]);
+                    } else {
+                        setMessages(prev => [...prev.slice(0, -1), {
+                            ...prev[prev.length - 1],
+                            text: prev[prev.length - 1].text + payload.delta
+                        }]);
+                    }
+                });
+            }
+            if (!sawEvent) {
+                // No events (stream endpoint failed, or a proxy buffered the
+                // response away): ask the plain endpoint instead
+                const fallback = await fetch(`${API_BASE_URL}/api/query`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ question: question }),
+                });
+
+                if (!fallback.ok) {
+                    // Try to extract error message from response
+                    let errorDetail = 'API request failed';
+                    try {
+                        const errorData = await fallback.json();
+                        errorDetail = errorData.detail || errorData.error || errorData.message || errorDetail;
+                    } catch (e) {
+                        // If JSON parsing fails, use status text
+                        errorDetail = fallback.statusText || errorDetail;
+                    }
+                    throw new Error(`${fallback.status}: ${errorDetail}`);
                 }
-                throw new Error(`${response.status}: ${errorDetail}`);
+                data = await fallback.json();
+            }
+            if (!data) {
+                throw new Error('API request failed');
             }
-
-            const data = await response.json();
             
-            // Add assistant response
-            setMessages(prev => [...prev, { 
+            // Replace the streamed text with the final formatted answer
+            const assistantMessage = { 
                 text: data.answer, 
                 isUser: false,
                 source: data.citation_link || null,
                 timestamp: data.timestamp || null
-            }]);
+            };
+            setMessages(prev => streamingStarted
+                ? [...prev.slice(0, -1), assistantMessage]
+                : [...prev, assistantMessage]);
         } catch (error) {
             console.error('Error:', error);
             let errorMessage = 'Sorry, I encountered an error. Please try again later.';
@@ -424,12 +646,13 @@ function ChatApp() {
                 errorMessage = errorStr.length > 100 ? errorStr.substring(0, 100) + '...' : errorStr;
             }
             
-            setMessages(prev => [...prev, { 
+            setMessages(prev => [...(streamingStarted ? prev.slice(0, -1) : prev), { 
                 text: errorMessage, 
                 isUser: false 
             }]);
         } finally {
             setIsLoading(false);
+            setIsStreaming(false);
         }
     };
 
@@ -465,7 +688,7 @@ function ChatApp() {
                                 timestamp={msg.timestamp}
                             />
                         ))}
-                        {isLoading && <LoadingBubble />}
+                        {isLoading && !isStreaming && <LoadingBubble />}
                         <div ref={messagesEndRef} />
                     </>
                 )}
@@ -789,65 +1012,64 @@ FRONTEND_STYLES_CSS = """/* Groww Brand Colors */
 
 # Try to load from files (for local development), but use embedded versions as fallback
 try:
-    loaded_jsx = load_frontend_file("app.jsx")
+    loaded_jsx = _read(RESOLVED_JSX_PATH)
     if loaded_jsx and len(loaded_jsx) > 100:  # Only use if substantial content
         FRONTEND_APP_JSX = loaded_jsx
-        logger.info(f"Loaded app.jsx from file ({len(loaded_jsx)} chars)")
+        logger.info("Loaded app.jsx from file (%d chars)", len(loaded_jsx))
     else:
-        logger.info(f"Using embedded app.jsx ({len(FRONTEND_APP_JSX)} chars)")
+        logger.info("Using embedded app.jsx (%d chars)", len(FRONTEND_APP_JSX))
 except Exception as e:
-    logger.info(f"Using embedded app.jsx (file load failed: {e})")
+    logger.info("Using embedded app.jsx (file load failed: %s)", e)
 
 try:
-    loaded_css = load_frontend_file("styles.css")
+    loaded_css = _read(RESOLVED_CSS_PATH)
     if loaded_css and len(loaded_css) > 100:  # Only use if substantial content
         FRONTEND_STYLES_CSS = loaded_css
-        logger.info(f"Loaded styles.css from file ({len(loaded_css)} chars)")
+        logger.info("Loaded styles.css from file (%d chars)", len(loaded_css))
     else:
-        logger.info(f"Using embedded styles.css ({len(FRONTEND_STYLES_CSS)} chars)")
+        logger.info("Using embedded styles.css (%d chars)", len(FRONTEND_STYLES_CSS))
 except Exception as e:
-    logger.info(f"Using embedded styles.css (file load failed: {e})")
+    logger.info("Using embedded styles.css (file load failed: %s)", e)
 
-# Generate HTML with embedded frontend files (lazy generation to ensure files are loaded)
-def get_frontend_html():
-    """Get frontend HTML, reloading files if needed"""
-    global FRONTEND_APP_JSX, FRONTEND_STYLES_CSS
+def compile_jsx(jsx_content: str) -> str:
+    """
+    Compile JSX to minified plain JS with esbuild, if it is available
     
-    try:
-        # If files weren't loaded, try again
-        if not FRONTEND_APP_JSX or not FRONTEND_STYLES_CSS:
-            logger.warning("Frontend files not loaded at startup, attempting to reload...")
-            if not FRONTEND_APP_JSX:
-                try:
-                    FRONTEND_APP_JSX = load_frontend_file("app.jsx")
-                except Exception as e:
-                    logger.error(f"Error reloading app.jsx: {e}")
-            if not FRONTEND_STYLES_CSS:
-                try:
-                    FRONTEND_STYLES_CSS = load_frontend_file("styles.css")
-                except Exception as e:
-                    logger.error(f"Error reloading styles.css: {e}")
+    Args:
+        jsx_content: JSX source
         
-        return generate_frontend_html(FRONTEND_APP_JSX, FRONTEND_STYLES_CSS)
+    Returns:
+        Compiled JS, or "" if esbuild is not installed or compilation fails
+    """
+    esbuild = shutil.which("esbuild")
+    if not esbuild:
+        return ""
+    try:
+        result = subprocess.run(
+            [esbuild, "--loader=jsx", "--minify"],
+            input=jsx_content, capture_output=True, text=True, timeout=30, check=True
+        )
+        return result.stdout
     except Exception as e:
-        logger.error(f"Error generating frontend HTML: {e}")
-        # Return minimal HTML with error message
-        return """<!DOCTYPE html>
-<html>
-<head><title>Error</title></head>
-<body>
-    <div style="padding: 20px; color: #44475B;">
-        <p>Error loading frontend. Please check server logs.</p>
-        <p style="font-size: 12px; color: #7C7E8C;">Error: """ + str(e) + """</p>
-    </div>
-</body>
-</html>"""
-
-# Generate initial HTML (will be regenerated on each request if needed)
+        logger.warning("esbuild failed to compile app.jsx: %s", e)
+        return ""
+
+# Prefer a prebuilt public/app.js (e.g. `esbuild public/app.jsx --loader:.jsx=jsx
+# --minify --outfile=public/app.js`), else compile once at startup; with neither,
+# the page falls back to in-browser Babel
+FRONTEND_APP_JS = _read(RESOLVED_JS_PATH)
+if not FRONTEND_APP_JS:
+    FRONTEND_APP_JS = compile_jsx(FRONTEND_APP_JSX)
+logger.info("Precompiled app.js: %s", 'yes' if FRONTEND_APP_JS else 'no, using in-browser Babel')
+
+# Generate HTML once at import; the frontend sources never change after startup
 try:
-    FRONTEND_HTML = get_frontend_html()
+    if FRONTEND_APP_JS:
+        FRONTEND_HTML = generate_frontend_html(FRONTEND_APP_JS, FRONTEND_STYLES_CSS, precompiled=True)
+    else:
+        FRONTEND_HTML = generate_frontend_html(FRONTEND_APP_JSX, FRONTEND_STYLES_CSS)
 except Exception as e:
-    logger.error(f"Error generating initial frontend HTML: {e}")
+    logger.error("Error generating initial frontend HTML: %s", e)
     FRONTEND_HTML = """<!DOCTYPE html>
 <html>
 <head><title>Error</title></head>
@@ -858,71 +1080,111 @@ except Exception as e:
 </body>
 </html>"""
 
-from fastapi.responses import HTMLResponse, Response
+# Pre-encoded response bodies and headers, shared by every request
+FRONTEND_APP_JSX_BYTES = FRONTEND_APP_JSX.encode('utf-8')
+FRONTEND_STYLES_CSS_BYTES = FRONTEND_STYLES_CSS.encode('utf-8')
+FRONTEND_HTML_BYTES = FRONTEND_HTML.encode('utf-8')
+
+
+def _make_etag(body: bytes, suffix: str = "") -> str:
+    """Strong ETag from the content hash of a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + suffix + '"'
+
+
+def make_static_asset(body: bytes, media_type: str, cache_control: str) -> Dict[str, Any]:
+    """
+    Precompute everything needed to serve a static body: identity, gzip and
+    (if brotli is installed) Brotli variants, each with its own strong ETag
+    
+    Args:
+        body: Encoded response body
+        media_type: Content type
+        cache_control: Cache-Control header value
+        
+    Returns:
+        Asset dictionary used by serve_static_asset()
+    """
+    headers = {"ETag": _make_etag(body), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    gzip_headers = {**headers, "ETag": _make_etag(body, "-gz"), "Content-Encoding": "gzip"}
+    asset = {
+        'body': body,
+        'gzip_body': gzip.compress(body, 9),
+        'media_type': media_type,
+        'headers': headers,
+        'gzip_headers': gzip_headers,
+    }
+    if HAS_BROTLI:
+        asset['br_body'] = brotli.compress(body, quality=11)
+        asset['br_headers'] = {**headers, "ETag": _make_etag(body, "-br"), "Content-Encoding": "br"}
+    return asset
+
+
+# Asset URLs are not fingerprinted, so they get a bounded max-age rather than
+# "immutable"; the HTML is always revalidated, which is a cheap 304 via ETag.
+APP_JSX_ASSET = make_static_asset(FRONTEND_APP_JSX_BYTES, "application/javascript", "public, max-age=3600")
+STYLES_CSS_ASSET = make_static_asset(FRONTEND_STYLES_CSS_BYTES, "text/css", "public, max-age=3600")
+HTML_ASSET = make_static_asset(FRONTEND_HTML_BYTES, "text/html; charset=utf-8", "no-cache")
+
+from fastapi.responses import Response
+
+
+def serve_static_asset(request: Request, asset: Dict[str, Any]) -> Response:
+    """Serve a precomputed asset: 304 on ETag match, Brotli or gzip if the client accepts it"""
+    accepted = {token.split(";")[0].strip() for token in request.headers.get("accept-encoding", "").split(",")}
+    if "br" in accepted and 'br_body' in asset:
+        body, headers = asset['br_body'], asset['br_headers']
+    elif "gzip" in accepted:
+        body, headers = asset['gzip_body'], asset['gzip_headers']
+    else:
+        body, headers = asset['body'], asset['headers']
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=asset['media_type'], headers=headers)
+
 
 # Serve frontend files
-@app.get("/app.jsx")
-async def serve_app_jsx():
+# Registered as plain Starlette routes: the handlers only need the raw request,
+# so they skip FastAPI's dependency solving and response validation
+async def serve_app_jsx(request: Request):
     """Serve app.jsx"""
-    if not FRONTEND_APP_JSX:
+    if not FRONTEND_APP_JSX_BYTES:
         raise HTTPException(status_code=500, detail="app.jsx not loaded")
-    return Response(
-        content=FRONTEND_APP_JSX, 
-        media_type="application/javascript",
-        headers={"Cache-Control": "no-cache"}
-    )
+    return serve_static_asset(request, APP_JSX_ASSET)
 
-@app.get("/styles.css")
-async def serve_styles_css():
+async def serve_styles_css(request: Request):
     """Serve styles.css"""
-    if not FRONTEND_STYLES_CSS:
+    if not FRONTEND_STYLES_CSS_BYTES:
         raise HTTPException(status_code=500, detail="styles.css not loaded")
-    return Response(
-        content=FRONTEND_STYLES_CSS, 
-        media_type="text/css",
-        headers={"Cache-Control": "no-cache"}
-    )
+    return serve_static_asset(request, STYLES_CSS_ASSET)
 
-@app.get("/")
-async def serve_frontend():
+async def serve_frontend(request: Request):
     """Serve frontend index.html at root"""
-    try:
-        # Regenerate HTML in case files weren't loaded at startup
-        html = get_frontend_html()
-        return HTMLResponse(
-            content=html,
-            headers={"Cache-Control": "no-cache"}
-        )
-    except Exception as e:
-        logger.error(f"Error serving frontend: {e}")
-        error_html = f"""<!DOCTYPE html>
-<html>
-<head><title>Error</title></head>
-<body>
-    <div style="padding: 20px; color: #44475B;">
-        <p>Error loading frontend.</p>
-        <p style="font-size: 12px; color: #7C7E8C;">Error: {str(e)}</p>
-    </div>
-</body>
-</html>"""
-        return HTMLResponse(content=error_html, status_code=200)
+    return serve_static_asset(request, HTML_ASSET)
+
+app.add_route("/app.jsx", serve_app_jsx, methods=["GET"], include_in_schema=False)
+app.add_route("/styles.css", serve_styles_css, methods=["GET"], include_in_schema=False)
+app.add_route("/", serve_frontend, methods=["GET"], include_in_schema=False)
+
+# Frontend sources are fixed after import, so the debug snapshot is too
+_DEBUG_INFO = {
+    "app_jsx_loaded": bool(FRONTEND_APP_JSX),
+    "app_jsx_length": len(FRONTEND_APP_JSX) if FRONTEND_APP_JSX else 0,
+    "styles_css_loaded": bool(FRONTEND_STYLES_CSS),
+    "styles_css_length": len(FRONTEND_STYLES_CSS) if FRONTEND_STYLES_CSS else 0,
+    "public_path_exists": public_path.exists(),
+    "project_root": str(project_root),
+    "public_path": str(public_path),
+    "current_working_dir": str(Path.cwd())
+}
+
 
 @app.get("/debug/frontend")
 async def debug_frontend():
     """Debug endpoint to check frontend file loading"""
-    return {
-        "app_jsx_loaded": bool(FRONTEND_APP_JSX),
-        "app_jsx_length": len(FRONTEND_APP_JSX) if FRONTEND_APP_JSX else 0,
-        "styles_css_loaded": bool(FRONTEND_STYLES_CSS),
-        "styles_css_length": len(FRONTEND_STYLES_CSS) if FRONTEND_STYLES_CSS else 0,
-        "public_path_exists": public_path.exists(),
-        "project_root": str(project_root),
-        "public_path": str(public_path),
-        "current_working_dir": str(Path.cwd())
-    }
+    return DefaultJSONResponse(_DEBUG_INFO)
 
 
-@app.get("/api/", response_model=dict)
+@app.get("/api/")
 async def api_root():
     """API root endpoint"""
     return {
@@ -930,6 +1192,8 @@ async def api_root():
         "version": "1.0.0",
         "endpoints": {
             "/api/query": "POST - Ask questions about mutual funds",
+            "/api/query/batch": "POST - Ask several questions in one request",
+            "/api/query/stream": "POST - Ask a question, streaming the answer (server-sent events)",
             "/api/schemes": "GET - List available mutual fund schemes",
             "/api/health": "GET - Health check",
             "/docs": "API documentation"
@@ -937,7 +1201,75 @@ async def api_root():
     }
 
 
-@app.post("/api/query", response_model=QueryResponse)
+def query_with_cache(pipeline: "RAGPipeline", question: str,
+                     fund_name: Optional[str], top_k: int,
+                     on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Answer from the query cache (normalized question match) or run the pipeline.
+    Runs in a worker thread, since the pipeline call blocks.
+    on_delta, if given, receives answer text as it streams (not called on cache hits).
+    """
+    cached = query_cache.get(question, fund_name, top_k)
+    if cached is not None:
+        return cached
+    
+    result = pipeline.query(question=question, fund_name=fund_name, top_k=top_k, on_delta=on_delta)
+    # Don't pin transient failures (rate limits, API errors) in the cache
+    if not pipeline.is_error_answer(result['answer']):
+        query_cache.put(question, result, fund_name, top_k)
+    return result
+
+
+# In-flight RAG queries keyed on (question, fund_name, top_k), so concurrent
+# identical requests share one pipeline run instead of each running it
+_inflight_queries: Dict[tuple, asyncio.Future] = {}
+
+
+async def run_query_coalesced(pipeline: "RAGPipeline", question: str,
+                              fund_name: Optional[str] = None, top_k: int = 3) -> Dict[str, Any]:
+    """Run pipeline.query in a worker thread, coalescing identical concurrent calls"""
+    key = (question, fund_name, top_k)
+    future = _inflight_queries.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            rag_executor,
+            functools.partial(query_with_cache, pipeline, question, fund_name, top_k)
+        )
+        _inflight_queries[key] = future
+        future.add_done_callback(lambda _: _inflight_queries.pop(key, None))
+    # Shield so one client disconnecting does not cancel the shared run
+    return await asyncio.shield(future)
+
+
+def build_query_response(question: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a pipeline.query result into the QueryResponse JSON shape. The
+    pipeline output is trusted, so this builds plain dicts instead of running
+    it through model validation on every request.
+    """
+    return {
+        'answer': result['answer'],
+        'sources': [
+            {
+                'fund_name': src['fund_name'],
+                'chunk_type': src['chunk_type'],
+                'similarity': src['similarity']
+            }
+            for src in result['sources']
+        ],
+        'confidence': result['confidence'],
+        'query': question,
+        'citation_link': result.get('citation_link', ''),
+        'timestamp': result.get('timestamp'),
+        'rejected': result.get('rejected', False),
+        'rejection_reason': result.get('rejection_reason')
+    }
+
+
+# The models are only documented (responses=...), not enforced: handlers return
+# ready-made JSON responses, so FastAPI skips response validation
+@app.post("/api/query", responses={200: {"model": QueryResponse}})
 async def query_funds(request: QueryRequest):
     """
     Query the mutual fund knowledge base
@@ -949,64 +1281,169 @@ async def query_funds(request: QueryRequest):
         QueryResponse with answer and sources
     """
     # Lazy initialize RAG pipeline (for serverless)
-    pipeline = get_rag_pipeline()
-    if not pipeline:
-        # Return specific error message if available
-        error_detail = rag_init_error or "RAG pipeline not initialized. Please check server logs."
-        raise HTTPException(
-            status_code=503,
-            detail=error_detail
-        )
+    pipeline = await require_rag_pipeline()
     
     try:
-        logger.info(f"Processing query: {request.question}")
-        
         # Query RAG pipeline
-        result = pipeline.query(
+        result = await run_query_coalesced(
+            pipeline,
             question=request.question,
             fund_name=request.fund_name,
             top_k=request.top_k
         )
         
-        # Convert sources to response format
-        sources = [
-            SourceInfo(
-                fund_name=src['fund_name'],
-                chunk_type=src['chunk_type'],
-                similarity=src['similarity']
-            )
-            for src in result['sources']
-        ]
-        
-        return QueryResponse(
-            answer=result['answer'],
-            sources=sources,
-            confidence=result['confidence'],
-            query=request.question,
-            citation_link=result.get('citation_link', ''),
-            timestamp=result.get('timestamp'),
-            rejected=result.get('rejected', False),
-            rejection_reason=result.get('rejection_reason')
-        )
+        return DefaultJSONResponse(build_query_response(request.question, result))
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
+    except GeminiKeyMissingError as e:
+        logger.error("Error processing query: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Error processing query: Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
+        )
+    except Exception as e:
+        logger.error("Error processing query: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing query: {e}"
+        )
+
+
+def encode_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes (orjson if available)"""
+    return orjson.dumps(data) if HAS_ORJSON else json.dumps(data).encode('utf-8')
+
+
+def encode_sse(data: Any, event: Optional[str] = None) -> bytes:
+    """Encode one server-sent event with a JSON payload"""
+    prefix = f"event: {event}\n".encode('utf-8') if event else b""
+    return prefix + b"data: " + encode_json(data) + b"\n\n"
+
+
+@app.post("/api/query/stream", responses={200: {"content": {"text/event-stream": {}}}})
+async def query_funds_stream(request: QueryRequest):
+    """
+    Query the knowledge base, streaming the answer as server-sent events
+    
+    Emits `data: {"delta": ...}` events while Gemini generates, then a single
+    `event: done` carrying the full QueryResponse (its formatted answer replaces
+    the streamed text), or `event: error` with a detail message.
+    
+    Args:
+        request: Query request with question and optional parameters
+        
+    Returns:
+        text/event-stream response
+    """
+    # Lazy initialize RAG pipeline (for serverless)
+    pipeline = await require_rag_pipeline()
+    
+    loop = asyncio.get_running_loop()
+    deltas: asyncio.Queue = asyncio.Queue()
+    
+    def on_delta(text: str):
+        # Called from the worker thread
+        loop.call_soon_threadsafe(deltas.put_nowait, text)
+    
+    async def event_stream():
+        future = loop.run_in_executor(
+            rag_executor,
+            functools.partial(query_with_cache, pipeline, request.question,
+                              request.fund_name, request.top_k, on_delta)
+        )
+        # Scheduled after every delta the worker queued, so it marks the end
+        future.add_done_callback(lambda _: deltas.put_nowait(None))
+        
+        while True:
+            delta = await deltas.get()
+            if delta is None:
+                break
+            yield encode_sse({'delta': delta})
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Error processing streamed query: %s", e, exc_info=True)
+            yield encode_sse({'detail': f"Error processing query: {e}"}, event="error")
+            return
+        yield encode_sse(build_query_response(request.question, result), event="done")
+    
+    # Content-Encoding makes GZipMiddleware pass the stream through untouched;
+    # compressing it would hold events back in the gzip buffer
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+    )
+
+
+# Limits for /api/query/batch: questions per request, and how many of them run
+# at once (keeps a single batch from tripping Gemini rate limits)
+MAX_BATCH_QUESTIONS = 10
+BATCH_CONCURRENCY = 4
+
+
+@app.post("/api/query/batch", responses={200: {"model": List[QueryResponse]}})
+async def query_funds_batch(requests: List[QueryRequest]):
+    """
+    Answer several questions in one round-trip
+    
+    Args:
+        requests: List of query requests (at most MAX_BATCH_QUESTIONS)
+        
+    Returns:
+        List of QueryResponse, in the same order as the requests
+    """
+    if not requests or len(requests) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch must contain between 1 and {MAX_BATCH_QUESTIONS} questions"
+        )
+    
+    # Lazy initialize RAG pipeline (for serverless)
+    pipeline = await require_rag_pipeline()
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def answer(request: QueryRequest) -> Dict[str, Any]:
+        async with semaphore:
+            result = await run_query_coalesced(
+                pipeline,
+                question=request.question,
+                fund_name=request.fund_name,
+                top_k=request.top_k
+            )
+        return build_query_response(request.question, result)
+    
+    try:
+        return DefaultJSONResponse(await asyncio.gather(*(answer(request) for request in requests)))
     except Exception as e:
-        logger.error(f"Error processing query: {e}", exc_info=True)
-        # Return more specific error details
-        error_detail = str(e)
-        if "Gemini API key" in error_detail or "GEMINI_API_KEY" in error_detail:
-            error_detail = "Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
-        elif "not initialized" in error_detail.lower():
-            error_detail = "RAG pipeline not initialized. Please check server logs."
+        logger.error("Error processing batch query: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
-            detail=f"Error processing query: {error_detail}"
+            detail=f"Error processing batch query: {str(e)}"
         )
 
 
-@app.get("/api/schemes", response_model=FundsResponse)
+def get_cached_json(key: str) -> Optional[Response]:
+    """Return the cached JSON response for key if it is still fresh"""
+    hit = _response_cache.get(key)
+    if hit and time.monotonic() - hit[0] < RESPONSE_CACHE_TTL:
+        return Response(content=hit[1], media_type="application/json")
+    return None
+
+
+def cache_json(key: str, model) -> Response:
+    """Serialize a response model, cache the body under key and return it"""
+    # pydantic-core writes the JSON directly, skipping the intermediate dict
+    body = model.model_dump_json().encode('utf-8')
+    _response_cache[key] = (time.monotonic(), body)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/api/schemes", responses={200: {"model": FundsResponse}})
 async def list_schemes():
     """
     List all available mutual fund schemes
@@ -1014,14 +1451,12 @@ async def list_schemes():
     Returns:
         FundsResponse with list of available funds
     """
+    cached = get_cached_json("schemes")
+    if cached:
+        return cached
+    
     # Lazy initialize RAG pipeline (for serverless)
-    pipeline = get_rag_pipeline()
-    if not pipeline:
-        error_detail = rag_init_error or "RAG pipeline not initialized"
-        raise HTTPException(
-            status_code=503,
-            detail=error_detail
-        )
+    pipeline = await require_rag_pipeline()
     
     try:
         funds = pipeline.list_available_funds()
@@ -1031,20 +1466,20 @@ async def list_schemes():
             for fund in funds
         ]
         
-        return FundsResponse(
+        return cache_json("schemes", FundsResponse(
             funds=fund_info,
             total=len(fund_info)
-        )
+        ))
         
     except Exception as e:
-        logger.error(f"Error listing schemes: {e}")
+        logger.error("Error listing schemes: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error listing schemes: {str(e)}"
         )
 
 
-@app.get("/api/health", response_model=HealthResponse)
+@app.get("/api/health", responses={200: {"model": HealthResponse}})
 async def health_check():
     """
     Health check endpoint
@@ -1052,20 +1487,28 @@ async def health_check():
     Returns:
         HealthResponse with system status
     """
+    cached = get_cached_json("health")
+    if cached:
+        return cached
+    
     # Lazy initialize RAG pipeline (for serverless)
-    pipeline = get_rag_pipeline()
+    pipeline = await get_rag_pipeline_async()
     rag_initialized = pipeline is not None
     chunks_loaded = len(pipeline.chunks) if pipeline else 0
     funds_available = len(pipeline.list_available_funds()) if pipeline else 0
     
     status = "healthy" if pipeline else "unhealthy"
     
-    return HealthResponse(
+    health = HealthResponse(
         status=status,
         rag_initialized=rag_initialized,
         chunks_loaded=chunks_loaded,
         funds_available=funds_available
     )
+    # Only cache a healthy status so a failed pipeline is retried on the next ping
+    if pipeline:
+        return cache_json("health", health)
+    return Response(content=health.model_dump_json(), media_type="application/json")
 
 
 @app.get("/api/query/simple")
@@ -1080,21 +1523,15 @@ async def query_simple(question: str = Query(..., description="Question about mu
         Simple JSON response with answer
     """
     # Lazy initialize RAG pipeline (for serverless)
-    pipeline = get_rag_pipeline()
-    if not pipeline:
-        error_detail = rag_init_error or "RAG pipeline not initialized"
-        raise HTTPException(
-            status_code=503,
-            detail=error_detail
-        )
+    pipeline = await require_rag_pipeline()
     
     try:
-        result = pipeline.query(question=question)
-        return {
+        result = await run_query_coalesced(pipeline, question=question)
+        return DefaultJSONResponse({
             "question": question,
             "answer": result['answer'],
             "confidence": result['confidence']
-        }
+        })
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1105,8 +1542,8 @@ async def query_simple(question: str = Query(..., description="Question about mu
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc)
+    return DefaultJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
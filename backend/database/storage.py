@@ -2,13 +2,39 @@
 Data Storage Layer - Stores scraped data in JSON format
 """
 import json
+import os
+import re
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+# Anything other than word characters (letters, digits, underscore) and '-'
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w-]+')
+
+
+def _encode_json(data: Any) -> bytes:
+    """Encode data as indented UTF-8 JSON (orjson if available, else stdlib json)"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _read_json(filepath: Path) -> Any:
+    """Read a JSON file (orjson if available, else stdlib json)"""
+    if HAS_ORJSON:
+        return orjson.loads(filepath.read_bytes())
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 
 class DataStorage:
     """Handles storage of scraped mutual fund data"""
@@ -24,6 +50,32 @@ class DataStorage:
         self.data_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"Data storage initialized at: {self.data_dir}")
     
+    def _write_new_json(self, prefix: str, data: Any) -> Path:
+        """
+        Write data to a new `<prefix>_<YYYYmmdd>_<HHMMSSffffff>.json` file
+        
+        The file is created with O_EXCL, so two saves in the same instant can
+        never overwrite each other; on a name clash a fresh timestamp is taken.
+        
+        Args:
+            prefix: File name prefix
+            data: JSON-serializable data
+            
+        Returns:
+            Path to the new file
+        """
+        body = _encode_json(data)
+        while True:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S%f")
+            filepath = self.data_dir / f"{prefix}_{timestamp}.json"
+            try:
+                fd = os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            return filepath
+    
     def save_fund_data(self, fund_data: Dict[str, Any], fund_name: str) -> Path:
         """
         Save fund data to JSON file
@@ -37,19 +89,14 @@ class DataStorage:
         """
         # Create safe filename from fund name
         safe_name = self._sanitize_filename(fund_name)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.json"
-        filepath = self.data_dir / filename
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(fund_data, f, indent=2, ensure_ascii=False)
-            
+            filepath = self._write_new_json(safe_name, fund_data)
             logger.info(f"Fund data saved to: {filepath}")
             return filepath
             
         except Exception as e:
-            logger.error(f"Error saving fund data to {filepath}: {e}")
+            logger.error(f"Error saving fund data for {fund_name}: {e}")
             raise
     
     def save_consolidated_data(self, all_funds_data: List[Dict[str, Any]]) -> Path:
@@ -62,10 +109,6 @@ class DataStorage:
         Returns:
             Path to saved file
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"all_funds_{timestamp}.json"
-        filepath = self.data_dir / filename
-        
         consolidated = {
             "extraction_date": datetime.now().isoformat(),
             "total_funds": len(all_funds_data),
@@ -73,14 +116,12 @@ class DataStorage:
         }
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(consolidated, f, indent=2, ensure_ascii=False)
-            
+            filepath = self._write_new_json("all_funds", consolidated)
             logger.info(f"Consolidated data saved to: {filepath}")
             return filepath
             
         except Exception as e:
-            logger.error(f"Error saving consolidated data to {filepath}: {e}")
+            logger.error(f"Error saving consolidated data: {e}")
             raise
     
     def load_fund_data(self, fund_name: str) -> Optional[Dict[str, Any]]:
@@ -93,20 +134,25 @@ class DataStorage:
         Returns:
             Fund data dictionary or None if not found
         """
-        safe_name = self._sanitize_filename(fund_name)
-        pattern = f"{safe_name}_*.json"
+        prefix = self._sanitize_filename(fund_name) + "_"
         
-        matching_files = list(self.data_dir.glob(pattern))
-        if not matching_files:
+        # Most recent `<safe_name>_*.json`; scandir entries reuse the stat
+        # from the directory read where the platform provides it
+        with os.scandir(self.data_dir) as entries:
+            latest = max(
+                (e for e in entries
+                 if e.name.startswith(prefix) and e.name.endswith(".json") and e.is_file()),
+                key=lambda e: e.stat().st_mtime_ns,
+                default=None
+            )
+        if latest is None:
             logger.warning(f"No data found for fund: {fund_name}")
             return None
         
-        # Get most recent file
-        latest_file = max(matching_files, key=lambda p: p.stat().st_mtime)
+        latest_file = Path(latest.path)
         
         try:
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _read_json(latest_file)
             logger.info(f"Loaded fund data from: {latest_file}")
             return data
         except Exception as e:
@@ -144,8 +190,6 @@ class DataStorage:
         Returns:
             Sanitized filename
         """
-        # Replace spaces and special characters
-        sanitized = name.replace(' ', '_')
-        sanitized = ''.join(c for c in sanitized if c.isalnum() or c in ('_', '-'))
-        return sanitized
+        # Replace spaces, then drop remaining special characters
+        return _UNSAFE_FILENAME_RE.sub('', name.replace(' ', '_'))
 
@@ -2,44 +2,138 @@
 Google Gemini API Client for intelligent data extraction
 """
 import os
+import io
+import re
 import json
+import hashlib
+import threading
 import urllib.request
 import urllib.parse
 import urllib.error
 import time
-from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
 import logging
 
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+# KEY=value lines; blank lines and # comments don't match
+_ENV_LINE_RE = re.compile(r'^[ \t]*([^#=\s][^=\n]*)=(.*)$', re.MULTILINE)
+_env_loaded = False
+
+# Optional ```json / ``` fences around a model reply; group 1 is the payload
+_CODE_FENCE_RE = re.compile(r'^(?:```(?:json)?)?\s*(.*?)\s*(?:```)?$', re.DOTALL)
+
 # Load .env manually
 def load_env():
-    """Load environment variables from .env file"""
+    """Load environment variables from .env file (once per process)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
     env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
-    if os.path.exists(env_path):
+    try:
         with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+            content = f.read()
+    except OSError:
+        return
+    for match in _ENV_LINE_RE.finditer(content):
+        os.environ[match.group(1).strip()] = match.group(2).strip()
 
 load_env()
 
 
+# Static prompt text, built once; callers splice in the (truncated) content
+EXTRACTION_PROMPT_HEAD = """You are an expert at analyzing mutual fund documents. Extract all relevant and informative data points from the following content.
+
+The content is from a {source_type} source about a mutual fund scheme.
+
+Extract the following information if available:
+- Expense ratio
+- Exit load
+- Minimum SIP amount
+- Lock-in period (especially for ELSS funds)
+- Riskometer rating
+- Benchmark index
+- Statement download procedures
+- NAV (Net Asset Value)
+- AUM (Assets Under Management)
+- Fund manager name
+- Launch date
+- Investment objective
+- Fund category
+- Any other relevant information that would be useful for investors
+
+IMPORTANT: 
+1. Extract ALL relevant data points, not just the ones listed above
+2. If a data point is not available, do not include it
+3. Return the data as a JSON object with clear, descriptive keys
+4. Be precise with numbers and percentages
+5. Include any additional informative fields you find
+
+Content to analyze:
+"""
+EXTRACTION_PROMPT_TAIL = """
+
+Return ONLY a valid JSON object, no additional text."""
+
+RELEVANCE_PROMPT_HEAD = """Determine if the following text contains relevant information about mutual funds that would be useful for investors.
+
+Relevant information includes:
+- Fund details (expense ratio, exit load, NAV, AUM)
+- Investment terms (minimum SIP, lock-in period)
+- Risk information (riskometer, risk factors)
+- Performance metrics
+- Fund manager information
+- Investment objectives
+- Statement/download procedures
+- Any other investor-relevant information
+
+Text to analyze:
+"""
+RELEVANCE_PROMPT_TAIL = """
+
+Respond with only "YES" or "NO"."""
+
+
+class GeminiKeyMissingError(ValueError):
+    """Raised when no Gemini API key is configured"""
+
+
 class GeminiClient:
     """Client for interacting with Google Gemini API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, extraction_cache_path: Optional[str] = None):
         """
         Initialize Gemini client
         
         Args:
             api_key: Gemini API key. If not provided, reads from GEMINI_API_KEY env var
+            extraction_cache_path: Optional JSON file persisting extract_relevant_data()
+                results across runs, keyed by a hash of the content sent to Gemini
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
-            raise ValueError("Gemini API key is required. Set GEMINI_API_KEY in .env file")
+            raise GeminiKeyMissingError("Gemini API key is required. Set GEMINI_API_KEY in .env file")
         
         # Use gemini-2.0-flash-lite (recommended by Google, cost-efficient and low latency)
         # This model is used to avoid rate limiting issues with newer models like gemini-2.5
@@ -47,8 +141,103 @@ class GeminiClient:
         self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent"
         self.max_retries = 3
         self.retry_delay_base = 2  # Base delay in seconds for exponential backoff
+        # Pooled keep-alive connections (thread-safe), so repeated calls skip the
+        # TCP/TLS handshake; without httpx each call opens a fresh urllib connection.
+        # With h2 installed, concurrent calls also multiplex over one HTTP/2 connection
+        self._http = httpx.Client(
+            http2=HAS_H2,
+            timeout=httpx.Timeout(30, connect=5),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16,
+                                keepalive_expiry=60)
+        ) if HAS_HTTPX else None
+        
+        self.extraction_cache_path = Path(extraction_cache_path) if extraction_cache_path else None
+        self._extraction_cache: Dict[str, Dict[str, Any]] = {}
+        self._extraction_cache_lock = threading.Lock()
+        if self.extraction_cache_path and self.extraction_cache_path.exists():
+            try:
+                with open(self.extraction_cache_path, 'r', encoding='utf-8') as f:
+                    self._extraction_cache = json.load(f)
+                logger.info(f"Loaded {len(self._extraction_cache)} cached extractions")
+            except Exception as e:
+                logger.warning(f"Error loading extraction cache: {e}")
         logger.info(f"Gemini client initialized with model: gemini-2.0-flash-lite")
     
+    def close(self):
+        """Close pooled HTTP connections"""
+        if self._http is not None:
+            self._http.close()
+    
+    @staticmethod
+    def _http_error(url: str, response: "httpx.Response") -> urllib.error.HTTPError:
+        """Convert an httpx error response to the HTTPError callers already handle"""
+        return urllib.error.HTTPError(
+            url, response.status_code, response.reason_phrase,
+            response.headers, io.BytesIO(response.content)
+        )
+    
+    def _post_json(self, api_url: str, json_data: bytes) -> Dict[str, Any]:
+        """
+        POST a JSON body to Gemini and decode the JSON response
+        
+        Args:
+            api_url: Full request URL (including the API key)
+            json_data: Encoded request body
+            
+        Returns:
+            Decoded response
+            
+        Raises:
+            urllib.error.HTTPError: On an error status (with or without httpx)
+        """
+        if self._http is None:
+            req = urllib.request.Request(
+                api_url,
+                data=json_data,
+                headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(req, timeout=30) as response:
+                # Both parsers take the raw bytes, no separate decode copy
+                body = response.read()
+        else:
+            response = self._http.post(api_url, content=json_data, headers={'Content-Type': 'application/json'})
+            if response.status_code >= 400:
+                raise self._http_error(api_url, response)
+            body = response.content
+        return orjson.loads(body) if HAS_ORJSON else json.loads(body)
+    
+    @contextmanager
+    def _stream_lines(self, api_url: str, json_data: bytes) -> Iterator[Iterator[str]]:
+        """
+        POST a JSON body and iterate over the response lines as they arrive
+        
+        Args:
+            api_url: Full request URL (including the API key)
+            json_data: Encoded request body
+            
+        Yields:
+            Iterator of decoded response lines
+            
+        Raises:
+            urllib.error.HTTPError: On an error status (with or without httpx)
+        """
+        if self._http is None:
+            req = urllib.request.Request(
+                api_url,
+                data=json_data,
+                headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(req, timeout=30) as response:
+                yield (raw_line.decode('utf-8') for raw_line in response)
+            return
+        
+        with self._http.stream("POST", api_url, content=json_data,
+                               headers={'Content-Type': 'application/json'}) as response:
+            if response.status_code >= 400:
+                response.read()
+                raise self._http_error(api_url, response)
+            yield response.iter_lines()
+    
     def _make_api_request_with_retry(self, prompt: str, max_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         Make API request with retry logic for rate limiting (429 errors)
@@ -74,15 +263,7 @@ class GeminiClient:
         
         for attempt in range(max_retries + 1):
             try:
-                req = urllib.request.Request(
-                    api_url,
-                    data=json_data,
-                    headers={'Content-Type': 'application/json'}
-                )
-                
-                with urllib.request.urlopen(req, timeout=30) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    return result
+                return self._post_json(api_url, json_data)
                     
             except urllib.error.HTTPError as e:
                 error_detail = str(e)
@@ -127,6 +308,55 @@ class GeminiClient:
                     logger.error(f"API request failed after {max_retries} retries: {e}")
                     raise
     
+    def stream_generate(self, prompt: str) -> Iterator[str]:
+        """
+        Stream a response from Gemini as it is generated (server-sent events)
+        
+        Not retried: once text has been yielded, a retry would repeat it.
+        
+        Args:
+            prompt: The prompt to send to Gemini
+            
+        Yields:
+            Text fragments in generation order
+            
+        Raises:
+            urllib.error.HTTPError: If the request fails
+        """
+        data = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }]
+        }
+        stream_url = self.api_url.replace(":generateContent", ":streamGenerateContent")
+        
+        with self._stream_lines(f"{stream_url}?alt=sse&key={self.api_key}",
+                                json.dumps(data).encode('utf-8')) as lines:
+            for line in lines:
+                line = line.strip()
+                if not line.startswith("data:"):
+                    continue
+                chunk = json.loads(line[5:])
+                candidates = chunk.get('candidates') or []
+                if not candidates:
+                    continue
+                for part in candidates[0].get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
+    
+    def _cache_extraction(self, cache_key: str, extracted_data: Dict[str, Any]):
+        """Store an extraction result and persist the cache if a path is configured"""
+        with self._extraction_cache_lock:
+            self._extraction_cache[cache_key] = dict(extracted_data)
+            if not self.extraction_cache_path:
+                return
+            try:
+                self.extraction_cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.extraction_cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._extraction_cache, f, indent=2, ensure_ascii=False)
+            except Exception as e:
+                logger.warning(f"Error saving extraction cache: {e}")
+    
     def extract_relevant_data(self, text_content: str, source_type: str) -> Dict[str, Any]:
         """
         Use Gemini to intelligently extract relevant data points from scraped content
@@ -138,37 +368,21 @@ class GeminiClient:
         Returns:
             Dictionary of extracted data points
         """
-        prompt = f"""You are an expert at analyzing mutual fund documents. Extract all relevant and informative data points from the following content.
-
-The content is from a {source_type} source about a mutual fund scheme.
-
-Extract the following information if available:
-- Expense ratio
-- Exit load
-- Minimum SIP amount
-- Lock-in period (especially for ELSS funds)
-- Riskometer rating
-- Benchmark index
-- Statement download procedures
-- NAV (Net Asset Value)
-- AUM (Assets Under Management)
-- Fund manager name
-- Launch date
-- Investment objective
-- Fund category
-- Any other relevant information that would be useful for investors
-
-IMPORTANT: 
-1. Extract ALL relevant data points, not just the ones listed above
-2. If a data point is not available, do not include it
-3. Return the data as a JSON object with clear, descriptive keys
-4. Be precise with numbers and percentages
-5. Include any additional informative fields you find
-
-Content to analyze:
-{text_content[:8000]}  # Limit to avoid token limits
-
-Return ONLY a valid JSON object, no additional text."""
+        # Unchanged content skips the Gemini call. Matching is exact on purpose:
+        # factsheets for different funds are near-identical apart from the numbers
+        cache_key = hashlib.blake2b(
+            f"{source_type}\n{text_content[:8000]}".encode('utf-8'), digest_size=16
+        ).hexdigest()
+        cached = self._extraction_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached extraction ({len(cached)} data points)")
+            return dict(cached)
+        
+        # Only the content is spliced in, so braces in scraped text are never
+        # interpreted as format fields
+        prompt = (EXTRACTION_PROMPT_HEAD.format(source_type=source_type)
+                  + text_content[:8000]  # Limit to avoid token limits
+                  + EXTRACTION_PROMPT_TAIL)
 
         try:
             # Make API request with retry logic
@@ -182,16 +396,13 @@ Return ONLY a valid JSON object, no additional text."""
                 return {}
             
             # Clean response - remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
+            response_text = _CODE_FENCE_RE.match(response_text).group(1)
             
-            extracted_data = json.loads(response_text)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            extracted_data = orjson.loads(response_text) if HAS_ORJSON else json.loads(response_text)
             logger.info(f"Successfully extracted {len(extracted_data)} data points using Gemini")
+            if extracted_data:
+                self._cache_extraction(cache_key, extracted_data)
             return extracted_data
             
         except urllib.error.HTTPError as e:
@@ -217,22 +428,7 @@ Return ONLY a valid JSON object, no additional text."""
         Returns:
             True if relevant, False otherwise
         """
-        prompt = f"""Determine if the following text contains relevant information about mutual funds that would be useful for investors.
-
-Relevant information includes:
-- Fund details (expense ratio, exit load, NAV, AUM)
-- Investment terms (minimum SIP, lock-in period)
-- Risk information (riskometer, risk factors)
-- Performance metrics
-- Fund manager information
-- Investment objectives
-- Statement/download procedures
-- Any other investor-relevant information
-
-Text to analyze:
-{text_chunk[:2000]}
-
-Respond with only "YES" or "NO"."""
+        prompt = RELEVANCE_PROMPT_HEAD + text_chunk[:2000] + RELEVANCE_PROMPT_TAIL
 
         try:
             # Make API request with retry logic
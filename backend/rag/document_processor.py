@@ -3,16 +3,59 @@ Document Processor for RAG Pipeline
 Handles chunking and preparation of scraped data for vector storage
 """
 import json
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
 
 class DocumentProcessor:
     """Processes scraped mutual fund data into chunks for RAG"""
     
+    # Citation source domains, most preferred first (any other http URL ranks last)
+    SOURCE_PRIORITY = ('hdfcfund.com', 'sebi.gov.in', 'amfiindia.com', 'groww.in')
+    
+    # (data key, label) pairs rendered as `Label: value` lines, in output order
+    BASIC_INFO_FIELDS = (
+        ('fund_category', 'Category'),
+        ('scheme_type', 'Scheme Type'),
+        ('asset_class', 'Asset Class'),
+        ('launch_date', 'Launch Date'),
+        ('investment_objective', 'Investment Objective'),
+    )
+    INVESTMENT_FIELDS = (
+        ('minimum_sip', 'Minimum SIP Amount'),
+        ('minimum_sip_amount', 'Minimum SIP Amount'),
+        ('minimum_lumpsum', 'Minimum Lumpsum Investment'),
+        ('minimum_lumpsum_investment', 'Minimum Lumpsum Investment'),
+        ('lock_in_period', 'Lock-in Period'),
+        ('available_plans', 'Available Plans'),
+        ('available_options', 'Available Options'),
+    )
+    RISK_PERFORMANCE_FIELDS = (
+        ('riskometer', 'Riskometer Rating'),
+        ('benchmark_index', 'Benchmark Index'),
+        ('benchmark', 'Benchmark Index'),
+        ('nav', 'NAV'),
+        ('aum', 'AUM (Assets Under Management)'),
+        ('fund_managers', 'Fund Manager(s)'),
+    )
+    # Fields covered by the other chunks (or not worth a line of their own)
+    ADDITIONAL_INFO_EXCLUDED = frozenset({
+        'fund_name', 'fund_category', 'scheme_type', 'asset_class', 'launch_date',
+        'investment_objective', 'minimum_sip', 'minimum_lumpsum', 'lock_in_period',
+        'available_plans', 'available_options', 'expense_ratio', 'exit_load',
+        'entry_load', 'riskometer', 'benchmark_index', 'nav', 'aum', 'fund_managers'
+    })
+    
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
         """
         Initialize document processor
@@ -23,6 +66,8 @@ class DocumentProcessor:
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # fund name -> fallback citation URL, read from config on first use
+        self._fallback_urls: Optional[Dict[str, str]] = None
     
     def load_fund_data(self, data_path: Path) -> Dict[str, Any]:
         """
@@ -35,6 +80,8 @@ class DocumentProcessor:
             Fund data dictionary
         """
         try:
+            if HAS_ORJSON:
+                return orjson.loads(Path(data_path).read_bytes())
             with open(data_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -69,117 +116,46 @@ class DocumentProcessor:
         # Get primary source URL (prefer HDFC, then SEBI, then AMFI, then Groww)
         primary_source_url = self._get_primary_source_url(source_urls, fund_name)
         
-        # Create chunks from structured data
-        # Chunk 1: Basic fund information
-        basic_info = self._format_basic_info(fund_name, data)
-        if basic_info:
-            chunks.append({
-                'text': basic_info,
-                'metadata': {
-                    'fund_name': fund_name,
-                    'chunk_type': 'basic_info',
-                    'source': 'structured_data',
-                    'source_urls': source_urls,
-                    'primary_source_url': primary_source_url
-                }
-            })
-        
-        # Chunk 2: Investment details
-        investment_info = self._format_investment_details(fund_name, data)
-        if investment_info:
-            chunks.append({
-                'text': investment_info,
-                'metadata': {
-                    'fund_name': fund_name,
-                    'chunk_type': 'investment_details',
-                    'source': 'structured_data',
-                    'source_urls': source_urls,
-                    'primary_source_url': primary_source_url
-                }
-            })
-        
-        # Chunk 3: Fees and charges
-        fees_info = self._format_fees_charges(fund_name, data)
-        if fees_info:
-            chunks.append({
-                'text': fees_info,
-                'metadata': {
-                    'fund_name': fund_name,
-                    'chunk_type': 'fees_charges',
-                    'source': 'structured_data',
-                    'source_urls': source_urls,
-                    'primary_source_url': primary_source_url
-                }
-            })
-        
-        # Chunk 4: Risk and performance
-        risk_info = self._format_risk_performance(fund_name, data)
-        if risk_info:
-            chunks.append({
-                'text': risk_info,
-                'metadata': {
-                    'fund_name': fund_name,
-                    'chunk_type': 'risk_performance',
-                    'source': 'structured_data',
-                    'source_urls': source_urls,
-                    'primary_source_url': primary_source_url
-                }
-            })
+        # Fields every chunk of this fund shares; each chunk only adds its type
+        base_metadata = {
+            'fund_name': fund_name,
+            'source': 'structured_data',
+            'source_urls': source_urls,
+            'primary_source_url': primary_source_url
+        }
         
-        # Chunk 5: Additional information
-        additional_info = self._format_additional_info(fund_name, data)
-        if additional_info:
-            chunks.append({
-                'text': additional_info,
-                'metadata': {
-                    'fund_name': fund_name,
-                    'chunk_type': 'additional_info',
-                    'source': 'structured_data',
-                    'source_urls': source_urls,
-                    'primary_source_url': primary_source_url
-                }
-            })
+        # Create chunks from structured data
+        chunk_formatters = (
+            ('basic_info', self._format_basic_info),                  # Basic fund information
+            ('investment_details', self._format_investment_details),  # Investment details
+            ('fees_charges', self._format_fees_charges),              # Fees and charges
+            ('risk_performance', self._format_risk_performance),      # Risk and performance
+            ('additional_info', self._format_additional_info),        # Additional information
+        )
+        for chunk_type, format_chunk in chunk_formatters:
+            text = format_chunk(fund_name, data)
+            if text:
+                chunks.append({
+                    'text': text,
+                    'metadata': {**base_metadata, 'chunk_type': chunk_type}
+                })
         
         logger.info(f"Created {len(chunks)} chunks for {fund_name}")
         return chunks
     
+    @staticmethod
+    def _format_fields(data: Dict[str, Any], fields: Tuple[Tuple[str, str], ...]) -> List[str]:
+        """Render the `Label: value` lines for the (key, label) fields present in data"""
+        return [f"{label}: {data[key]}" for key, label in fields if key in data]
+    
     def _format_basic_info(self, fund_name: str, data: Dict[str, Any]) -> str:
         """Format basic fund information"""
-        parts = [f"Fund Name: {fund_name}"]
-        
-        if 'fund_category' in data:
-            parts.append(f"Category: {data['fund_category']}")
-        if 'scheme_type' in data:
-            parts.append(f"Scheme Type: {data['scheme_type']}")
-        if 'asset_class' in data:
-            parts.append(f"Asset Class: {data['asset_class']}")
-        if 'launch_date' in data:
-            parts.append(f"Launch Date: {data['launch_date']}")
-        if 'investment_objective' in data:
-            parts.append(f"Investment Objective: {data['investment_objective']}")
-        
-        return "\n".join(parts)
+        return "\n".join([f"Fund Name: {fund_name}", *self._format_fields(data, self.BASIC_INFO_FIELDS)])
     
     def _format_investment_details(self, fund_name: str, data: Dict[str, Any]) -> str:
         """Format investment-related details"""
-        parts = [f"Investment Details for {fund_name}:"]
-        
-        if 'minimum_sip' in data:
-            parts.append(f"Minimum SIP Amount: {data['minimum_sip']}")
-        if 'minimum_sip_amount' in data:
-            parts.append(f"Minimum SIP Amount: {data['minimum_sip_amount']}")
-        if 'minimum_lumpsum' in data:
-            parts.append(f"Minimum Lumpsum Investment: {data['minimum_lumpsum']}")
-        if 'minimum_lumpsum_investment' in data:
-            parts.append(f"Minimum Lumpsum Investment: {data['minimum_lumpsum_investment']}")
-        if 'lock_in_period' in data:
-            parts.append(f"Lock-in Period: {data['lock_in_period']}")
-        if 'available_plans' in data:
-            parts.append(f"Available Plans: {data['available_plans']}")
-        if 'available_options' in data:
-            parts.append(f"Available Options: {data['available_options']}")
-        
-        return "\n".join(parts) if len(parts) > 1 else ""
+        lines = self._format_fields(data, self.INVESTMENT_FIELDS)
+        return "\n".join([f"Investment Details for {fund_name}:", *lines]) if lines else ""
     
     def _format_fees_charges(self, fund_name: str, data: Dict[str, Any]) -> str:
         """Format fees and charges information"""
@@ -217,39 +193,21 @@ class DocumentProcessor:
     
     def _format_risk_performance(self, fund_name: str, data: Dict[str, Any]) -> str:
         """Format risk and performance information"""
-        parts = [f"Risk and Performance for {fund_name}:"]
-        
-        if 'riskometer' in data:
-            parts.append(f"Riskometer Rating: {data['riskometer']}")
-        if 'benchmark_index' in data:
-            parts.append(f"Benchmark Index: {data['benchmark_index']}")
-        if 'benchmark' in data:
-            parts.append(f"Benchmark Index: {data['benchmark']}")
-        if 'nav' in data:
-            parts.append(f"NAV: {data['nav']}")
-        if 'aum' in data:
-            parts.append(f"AUM (Assets Under Management): {data['aum']}")
-        if 'fund_managers' in data:
-            parts.append(f"Fund Manager(s): {data['fund_managers']}")
-        
-        return "\n".join(parts) if len(parts) > 1 else ""
+        lines = self._format_fields(data, self.RISK_PERFORMANCE_FIELDS)
+        return "\n".join([f"Risk and Performance for {fund_name}:", *lines]) if lines else ""
     
     def _format_additional_info(self, fund_name: str, data: Dict[str, Any]) -> str:
         """Format additional information"""
         parts = [f"Additional Information for {fund_name}:"]
         
         # Include any other relevant fields
-        excluded_fields = {
-            'fund_name', 'fund_category', 'scheme_type', 'asset_class', 'launch_date',
-            'investment_objective', 'minimum_sip', 'minimum_lumpsum', 'lock_in_period',
-            'available_plans', 'available_options', 'expense_ratio', 'exit_load',
-            'entry_load', 'riskometer', 'benchmark_index', 'nav', 'aum', 'fund_managers'
-        }
-        
         for key, value in data.items():
-            if key not in excluded_fields and not key.endswith('_alternatives'):
-                if value and str(value).strip():
-                    parts.append(f"{key.replace('_', ' ').title()}: {value}")
+            if not value or key in self.ADDITIONAL_INFO_EXCLUDED or key.endswith('_alternatives'):
+                continue
+            # Non-empty non-string JSON values never render as blank
+            if isinstance(value, str) and not value.strip():
+                continue
+            parts.append(f"{key.replace('_', ' ').title()}: {value}")
         
         return "\n".join(parts) if len(parts) > 1 else ""
     
@@ -264,24 +222,35 @@ class DocumentProcessor:
             List of all chunks from all funds
         """
         all_chunks = []
+        processed_funds = set()
         
-        # Process consolidated file if exists
-        consolidated_file = data_dir / "all_funds_*.json"
-        consolidated_files = list(data_dir.glob("all_funds_*.json"))
+        # One directory pass: newest consolidated file plus the individual files
+        latest_consolidated, latest_mtime = None, None
+        individual_files = []
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".json") or not entry.is_file():
+                    continue
+                if name.startswith("all_funds_"):
+                    mtime = entry.stat().st_mtime_ns
+                    if latest_mtime is None or mtime > latest_mtime:
+                        latest_consolidated, latest_mtime = Path(entry.path), mtime
+                elif name.startswith("HDFC_"):
+                    individual_files.append(Path(entry.path))
         
-        if consolidated_files:
-            latest_consolidated = max(consolidated_files, key=lambda p: p.stat().st_mtime)
+        # Process consolidated file if exists
+        if latest_consolidated is not None:
             logger.info(f"Processing consolidated file: {latest_consolidated}")
-            data = self.load_fund_data(latest_consolidated)
+            # Only the funds list is kept, so the rest of the document can be freed
+            funds = self.load_fund_data(latest_consolidated).get('funds', [])
             
-            funds = data.get('funds', [])
             for fund_data in funds:
                 chunks = self.process_fund_to_chunks(fund_data)
                 all_chunks.extend(chunks)
+                processed_funds.add(fund_data.get('fund_name', ''))
         
         # Also process individual fund files
-        individual_files = list(data_dir.glob("HDFC_*.json"))
-        processed_funds = set()
         
         for file_path in individual_files:
             fund_data = self.load_fund_data(file_path)
@@ -311,24 +280,23 @@ class DocumentProcessor:
             # Fallback: try to load from config
             return self._get_fallback_url(fund_name)
         
-        # Priority order: HDFC > SEBI > AMFI > Groww > any other source
-        for url in source_urls:
-            if 'hdfcfund.com' in url:
-                return url
-        for url in source_urls:
-            if 'sebi.gov.in' in url:
-                return url
-        for url in source_urls:
-            if 'amfiindia.com' in url:
-                return url
-        for url in source_urls:
-            if 'groww.in' in url:
-                return url
-        
-        # Return first valid URL (any other source)
+        # One pass: keep the best-ranked URL, first one wins within a rank
+        best_rank, best_url = len(self.SOURCE_PRIORITY) + 1, None
         for url in source_urls:
-            if url and url.startswith('http'):
-                return url
+            if not url:
+                continue
+            for rank, domain in enumerate(self.SOURCE_PRIORITY):
+                if domain in url:
+                    break
+            else:
+                # Any other source, as long as it is a valid URL
+                rank = len(self.SOURCE_PRIORITY) if url.startswith('http') else None
+            if rank is not None and rank < best_rank:
+                if rank == 0:
+                    return url
+                best_rank, best_url = rank, url
+        if best_url:
+            return best_url
         
         # Final fallback
         return self._get_fallback_url(fund_name)
@@ -343,26 +311,38 @@ class DocumentProcessor:
         Returns:
             Fallback URL
         """
+        if self._fallback_urls is None:
+            self._fallback_urls = self._load_fallback_urls()
+        url = self._fallback_urls.get(fund_name)
+        if url is not None:
+            return url
+        
+        # Default fallback
+        return "https://groww.in/p/mutual-funds"
+    
+    @staticmethod
+    def _load_fallback_urls() -> Dict[str, str]:
+        """
+        Build the fund name -> fallback URL map from the config file
+        
+        Returns:
+            Dictionary of fallback URLs (empty if the config can't be read)
+        """
+        fallback_urls = {}
         try:
             config_path = Path("config/fund_sources.json")
             if config_path.exists():
                 with open(config_path, 'r') as f:
                     config = json.load(f)
-                    for fund in config.get('funds', []):
-                        if fund.get('name') == fund_name:
-                            sources = fund.get('sources', {})
-                            # Priority: HDFC > SEBI > AMFI > Groww
-                            if 'hdfc' in sources:
-                                return sources['hdfc']
-                            if 'sebi' in sources:
-                                return sources['sebi']
-                            if 'amfi_pdf' in sources:
-                                return sources['amfi_pdf']
-                            if 'groww' in sources:
-                                return sources['groww']
+                for fund in config.get('funds', []):
+                    sources = fund.get('sources', {})
+                    # Priority: HDFC > SEBI > AMFI > Groww
+                    for key in ('hdfc', 'sebi', 'amfi_pdf', 'groww'):
+                        if key in sources:
+                            # First entry wins, like the old per-call scan
+                            fallback_urls.setdefault(fund.get('name'), sources[key])
+                            break
         except Exception as e:
             logger.warning(f"Error loading fallback URL: {e}")
-        
-        # Default fallback
-        return "https://groww.in/p/mutual-funds"
+        return fallback_urls
 
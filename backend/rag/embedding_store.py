@@ -2,20 +2,38 @@
 Embedding Store for RAG Pipeline
 Stores and retrieves document embeddings using Gemini API
 """
+import hashlib
+import heapq
 import json
+import math
 import os
+import zlib
+from collections import Counter
+from operator import itemgetter, mul
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
 import urllib.request
 import urllib.parse
 
+from ..llm.gemini_client import GeminiKeyMissingError
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingStore:
     """Manages embeddings for RAG retrieval"""
     
+    # Every stored vector has this many dimensions and unit L2 norm (or is all
+    # zeros), which is what lets dot_similarity skip the norm computation
+    EMBEDDING_DIM = 128
+    
     def __init__(self, storage_dir: str = "data/embeddings", api_key: Optional[str] = None):
         """
         Initialize embedding store
@@ -29,28 +47,53 @@ class EmbeddingStore:
         
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
-            raise ValueError("Gemini API key is required")
+            raise GeminiKeyMissingError("Gemini API key is required")
         
         self.embeddings_file = self.storage_dir / "embeddings.json"
         self.embeddings_cache = {}
+        self._dirty = False  # True once entries were added since the last save
         self._load_embeddings()
     
     def _load_embeddings(self):
         """Load embeddings from disk"""
         if self.embeddings_file.exists():
             try:
-                with open(self.embeddings_file, 'r') as f:
-                    self.embeddings_cache = json.load(f)
+                if HAS_ORJSON:
+                    cache = orjson.loads(self.embeddings_file.read_bytes())
+                else:
+                    with open(self.embeddings_file, 'r') as f:
+                        cache = json.load(f)
+                # Entries keyed by the old per-process hash() (decimal strings) were
+                # built with a randomized word hash too, so they can't be reused
+                self.embeddings_cache = {
+                    key: entry for key, entry in cache.items()
+                    if not key.lstrip('-').isdigit() and self._is_normalized(entry.get('embedding'))
+                }
                 logger.info(f"Loaded {len(self.embeddings_cache)} embeddings from cache")
             except Exception as e:
                 logger.warning(f"Error loading embeddings cache: {e}")
                 self.embeddings_cache = {}
     
+    @classmethod
+    def _is_normalized(cls, embedding: Optional[List[float]]) -> bool:
+        """Check a loaded vector against the EMBEDDING_DIM / unit-norm invariant"""
+        if not isinstance(embedding, list) or len(embedding) != cls.EMBEDDING_DIM:
+            return False
+        norm = math.hypot(*embedding)
+        return norm == 0 or abs(norm - 1.0) < 1e-6
+    
     def _save_embeddings(self):
-        """Save embeddings to disk"""
+        """Save embeddings to disk (no-op if nothing was added since the last save)"""
+        if not self._dirty:
+            return
         try:
-            with open(self.embeddings_file, 'w') as f:
-                json.dump(self.embeddings_cache, f, indent=2)
+            # Compact: indentation roughly doubled the file for the float vectors
+            if HAS_ORJSON:
+                self.embeddings_file.write_bytes(orjson.dumps(self.embeddings_cache))
+            else:
+                with open(self.embeddings_file, 'w') as f:
+                    json.dump(self.embeddings_cache, f, separators=(',', ':'))
+            self._dirty = False
         except Exception as e:
             logger.error(f"Error saving embeddings cache: {e}")
     
@@ -64,8 +107,8 @@ class EmbeddingStore:
         Returns:
             Embedding vector
         """
-        # Check cache first
-        text_hash = str(hash(text))
+        # Check cache first (content hash, stable across processes unlike hash())
+        text_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
         if text_hash in self.embeddings_cache:
             return self.embeddings_cache[text_hash]['embedding']
         
@@ -80,10 +123,8 @@ class EmbeddingStore:
             embedding = self._simple_embedding(text)
             
             # Cache it
-            self.embeddings_cache[text_hash] = {
-                'embedding': embedding,
-                'text': text[:100]  # Store first 100 chars for reference
-            }
+            self.embeddings_cache[text_hash] = {'embedding': embedding}
+            self._dirty = True
             
             return embedding
             
@@ -105,20 +146,20 @@ class EmbeddingStore:
         # Simple TF-IDF-like representation
         # This is a placeholder - for production, use proper embeddings
         words = text.lower().split()
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq = Counter(words)  # counted in C
         
-        # Create a fixed-size vector (128 dimensions)
-        embedding = [0.0] * 128
+        # Create a fixed-size vector (EMBEDDING_DIM dimensions)
+        embedding = [0.0] * self.EMBEDDING_DIM
         
         # Simple hash-based distribution
-        for i, (word, freq) in enumerate(word_freq.items()):
-            idx = hash(word) % 128
-            embedding[idx] += freq / len(words)
+        total = len(words)
+        # crc32 rather than hash(): str hashes are randomized per process, which
+        # would make embeddings cached on disk disagree with fresh query embeddings
+        for word, freq in word_freq.items():
+            embedding[zlib.crc32(word.encode('utf-8')) % self.EMBEDDING_DIM] += freq / total
         
-        # Normalize
-        norm = sum(x * x for x in embedding) ** 0.5
+        # Normalize (hypot computes the Euclidean norm in C)
+        norm = math.hypot(*embedding)
         if norm > 0:
             embedding = [x / norm for x in embedding]
         
@@ -157,15 +198,33 @@ class EmbeddingStore:
         if len(vec1) != len(vec2):
             return 0.0
         
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = sum(a * a for a in vec1) ** 0.5
-        norm2 = sum(b * b for b in vec2) ** 0.5
+        # map(mul) and hypot keep all three passes over the vectors in C
+        dot_product = sum(map(mul, vec1, vec2))
+        norm1 = math.hypot(*vec1)
+        norm2 = math.hypot(*vec2)
         
         if norm1 == 0 or norm2 == 0:
             return 0.0
         
         return dot_product / (norm1 * norm2)
     
+    @staticmethod
+    def dot_similarity(vec1: List[float], vec2: List[float]) -> float:
+        """
+        Cosine similarity for vectors from generate_embedding
+        
+        Those are already L2-normalized (or all zeros), so the dot product is
+        the cosine and the two norm passes of cosine_similarity can be skipped.
+        
+        Args:
+            vec1: First normalized vector
+            vec2: Second normalized vector
+            
+        Returns:
+            Cosine similarity score (0-1)
+        """
+        return sum(map(mul, vec1, vec2))
+    
     def find_similar_chunks(self, query_embedding: List[float], chunks: List[Dict[str, Any]], 
                            top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -186,14 +245,13 @@ class EmbeddingStore:
                 # Generate embedding if not present
                 chunk['embedding'] = self.generate_embedding(chunk['text'])
             
-            similarity = self.cosine_similarity(query_embedding, chunk['embedding'])
+            similarity = self.dot_similarity(query_embedding, chunk['embedding'])
             results.append({
                 'chunk': chunk,
                 'similarity': similarity
             })
         
-        # Sort by similarity and return top_k
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:top_k]
+        # Partial sort: only the top_k results are ordered
+        return heapq.nlargest(top_k, results, key=itemgetter('similarity'))
 
 
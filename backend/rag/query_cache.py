@@ -0,0 +1,80 @@
+"""
+Query Cache - Caches RAG answers for repeated questions
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """LRU answer cache keyed on the normalized question text"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        """
+        Initialize query cache
+
+        Args:
+            maxsize: Maximum number of cached answers (least recently used evicted first)
+            ttl: Seconds a cached answer stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (created_at, result)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(question: str, fund_name: Optional[str], top_k: int) -> Tuple:
+        """Normalize question text so case/whitespace variants share an entry"""
+        return (" ".join(question.lower().split()), fund_name, top_k)
+
+    def get(self, question: str, fund_name: Optional[str] = None,
+            top_k: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached answer
+
+        Args:
+            question: User's question
+            fund_name: Optional fund filter the answer was produced with
+            top_k: Number of chunks the answer was produced with
+
+        Returns:
+            Cached pipeline result or None
+        """
+        key = self._make_key(question, fund_name, top_k)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, question: str, result: Dict[str, Any], fund_name: Optional[str] = None,
+            top_k: int = 3):
+        """
+        Store a pipeline result
+
+        Args:
+            question: User's question
+            result: Pipeline result to cache
+            fund_name: Optional fund filter the answer was produced with
+            top_k: Number of chunks the answer was produced with
+        """
+        key = self._make_key(question, fund_name, top_k)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached answers"""
+        with self._lock:
+            self._entries.clear()
@@ -2,12 +2,28 @@
 Query Classifier - Determines if query is factual, opinionated, or contains PII
 """
 import re
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterable, Pattern, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _keyword_regex(keywords: Iterable[str]) -> Pattern:
+    """
+    Compile keywords into one alternation that matches wherever any of them
+    occurs as a plain substring (same result as `any(k in text for k in keywords)`)
+    
+    Args:
+        keywords: Literal substrings to look for
+        
+    Returns:
+        Compiled pattern; use .search()
+    """
+    # Longest first so a shared prefix doesn't shadow the longer keyword
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, ordered)))
+
+
 class QueryClassifier:
     """Classifies user queries to enforce chatbot constraints"""
     
@@ -63,11 +79,69 @@ class QueryClassifier:
         'pan': r'\b[A-Z]{5}[0-9]{4}[A-Z]\b',
         'aadhaar': r'\b[0-9]{4}\s?[0-9]{4}\s?[0-9]{4}\b',
         'account_number': r'\b\d{9,18}\b',
-        'otp': r'\b\d{4,6}\b.*otp|\botp.*\b\d{4,6}\b',
+        # otp (a 4-6 digit code and 'otp' on the same line) is checked in
+        # _contains_otp: as a regex its .* gap backtracks quadratically
         'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
         'phone': r'\b[6-9]\d{9}\b|\b\+91[6-9]\d{9}\b'
     }
     
+    # Mentions of a specific fund (those questions are answered from scraped data)
+    FUND_INDICATORS = [
+        'hdfc', 'elss', 'flexi cap', 'large and mid cap',
+        'fund name', 'scheme', 'specific fund'
+    ]
+    
+    # Patterns that indicate general finance questions (without specific funds)
+    GENERAL_QUESTION_PATTERNS = [
+        'what is', 'what are', 'what does', 'what do',
+        'explain', 'define', 'definition', 'meaning',
+        'how does', 'how do', 'how is', 'how are',
+        'tell me about', 'can you explain', 'can you tell me'
+    ]
+    
+    # Finance/mutual fund terms a general question must mention
+    FINANCE_TERMS = [
+        'mutual fund', 'expense ratio', 'exit load', 'sip',
+        'nav', 'aum', 'benchmark', 'riskometer', 'lock-in',
+        'direct plan', 'regular plan', 'equity', 'debt',
+        'fund', 'investment', 'investing', 'portfolio',
+        'amc', 'sebi', 'amfi', 'elss', 'tax saver'
+    ]
+    
+    # Factual patterns that might otherwise match opinionated keywords
+    FACTUAL_EXCLUSIONS = [
+        'how to download', 'download statements', 'download capital',
+        'description of', 'overview of', 'meaning of', 'what is the meaning'
+    ]
+    
+    # Comparison patterns (regular expressions)
+    COMPARISON_PATTERNS = [
+        r'which.*better',
+        r'which.*best',
+        r'which.*worse',
+        r'compare.*fund',
+        r'better.*than',
+        r'worse.*than'
+    ]
+    
+    # Question words that suggest factual queries when a query starts with them
+    QUESTION_WORDS = ('what', 'when', 'where', 'who', 'which', 'how')
+    
+    # Each keyword list compiled once into a single pattern, so a query is
+    # scanned once per category in C instead of once per keyword in Python
+    _FACTUAL_RE = _keyword_regex(GREETING_PATTERNS + GENERAL_FINANCE_KEYWORDS + FACTUAL_KEYWORDS)
+    _OPINIONATED_RE = _keyword_regex(OPINIONATED_KEYWORDS)
+    _FACTUAL_EXCLUSIONS_RE = _keyword_regex(FACTUAL_EXCLUSIONS)
+    _COMPARISON_RE = re.compile('|'.join(COMPARISON_PATTERNS))
+    _FUND_INDICATORS_RE = _keyword_regex(FUND_INDICATORS)
+    _GENERAL_QUESTION_RE = _keyword_regex(GENERAL_QUESTION_PATTERNS)
+    _FINANCE_TERMS_RE = _keyword_regex(FINANCE_TERMS)
+    _PII_RES = {pii_type: re.compile(pattern, re.IGNORECASE) for pii_type, pattern in PII_PATTERNS.items()}
+    # Matches wherever any PII pattern would, so clean queries take one pass
+    _PII_ANY_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in PII_PATTERNS.values()), re.IGNORECASE)
+    _OTP_CODE_RE = re.compile(r'\b\d{4,6}\b')
+    _OTP_WORD_RE = re.compile(r'\botp', re.IGNORECASE)
+    
     def classify_query(self, query: str) -> Dict[str, Any]:
         """
         Classify query and detect issues
@@ -76,23 +150,35 @@ class QueryClassifier:
             query: User's query string
             
         Returns:
-            Dictionary with classification results
+            Dictionary with classification results (a query with PII is rejected
+            before the keyword checks run, so its is_* flags are all False)
         """
-        query_lower = query.lower()
-        
-        # Check for PII
+        # Check for PII first; it rejects the query whatever else it contains
         pii_detected = self._detect_pii(query)
+        if pii_detected:
+            return {
+                'is_factual': False,
+                'is_opinionated': False,
+                'is_general_finance': False,
+                'pii_detected': pii_detected,
+                'can_answer': False,
+                'rejection_reason': self._get_rejection_reason(False, False, pii_detected)
+            }
+        
+        query_lower = query.lower()
         
         # Classify query type
         is_factual = self._is_factual(query_lower)
         is_opinionated = self._is_opinionated(query_lower)
         
         # Determine if query should be answered
-        can_answer = is_factual and not is_opinionated and not pii_detected
+        can_answer = is_factual and not is_opinionated
         
         return {
             'is_factual': is_factual,
             'is_opinionated': is_opinionated,
+            # Only needed to route answerable queries
+            'is_general_finance': can_answer and self._is_general_finance(query_lower),
             'pii_detected': pii_detected,
             'can_answer': can_answer,
             'rejection_reason': self._get_rejection_reason(is_factual, is_opinionated, pii_detected)
@@ -100,27 +186,13 @@ class QueryClassifier:
     
     def _is_factual(self, query_lower: str) -> bool:
         """Check if query is factual"""
-        # Check for greetings first (these are allowed but not strictly factual)
-        for greeting in self.GREETING_PATTERNS:
-            if greeting in query_lower:
-                return True  # Allow greetings to pass through
-        
-        # Check for general finance/education keywords (these are factual and should be answered)
-        for keyword in self.GENERAL_FINANCE_KEYWORDS:
-            if keyword in query_lower:
-                return True
-        
-        # Check for factual keywords
-        for keyword in self.FACTUAL_KEYWORDS:
-            if keyword in query_lower:
-                return True
-        
-        # Check for question words that suggest factual queries
-        question_words = ['what', 'when', 'where', 'who', 'which', 'how']
-        if any(query_lower.startswith(word) for word in question_words):
+        # Greetings (allowed to pass through), general finance/education
+        # keywords and factual keywords all count as factual
+        if self._FACTUAL_RE.search(query_lower):
             return True
         
-        return False
+        # Check for question words that suggest factual queries
+        return query_lower.startswith(self.QUESTION_WORDS)
     
     def is_general_finance_question(self, query: str) -> bool:
         """
@@ -132,87 +204,79 @@ class QueryClassifier:
         Returns:
             True if it's a general finance question (no specific fund mentioned)
         """
-        query_lower = query.lower()
-        
+        return self._is_general_finance(query.lower())
+    
+    def _is_general_finance(self, query_lower: str) -> bool:
+        """is_general_finance_question() for an already lowercased query"""
         # If query mentions a specific fund, it's NOT a general question
-        fund_indicators = [
-            'hdfc', 'elss', 'flexi cap', 'large and mid cap',
-            'fund name', 'scheme', 'specific fund'
-        ]
-        if any(indicator in query_lower for indicator in fund_indicators):
+        if self._FUND_INDICATORS_RE.search(query_lower):
             return False  # This is about a specific fund, use scraped data
         
-        # Patterns that indicate general finance questions (without specific funds)
-        general_patterns = [
-            'what is', 'what are', 'what does', 'what do',
-            'explain', 'define', 'definition', 'meaning',
-            'how does', 'how do', 'how is', 'how are',
-            'tell me about', 'can you explain', 'can you tell me'
-        ]
-        
-        # Check if query starts with general question patterns
-        for pattern in general_patterns:
-            if query_lower.startswith(pattern) or pattern in query_lower:
-                # Check if it's about finance/mutual funds (but NOT a specific fund)
-                finance_terms = [
-                    'mutual fund', 'expense ratio', 'exit load', 'sip',
-                    'nav', 'aum', 'benchmark', 'riskometer', 'lock-in',
-                    'direct plan', 'regular plan', 'equity', 'debt',
-                    'fund', 'investment', 'investing', 'portfolio',
-                    'amc', 'sebi', 'amfi', 'elss', 'tax saver'
-                ]
-                if any(term in query_lower for term in finance_terms):
-                    # Double-check: if it mentions a fund name, it's not general
-                    if not any(fund_ind in query_lower for fund_ind in fund_indicators):
-                        return True
-        
-        return False
+        # A general question pattern about finance/mutual funds
+        return bool(self._GENERAL_QUESTION_RE.search(query_lower)
+                    and self._FINANCE_TERMS_RE.search(query_lower))
     
     def _is_opinionated(self, query_lower: str) -> bool:
         """Check if query is opinionated or asks for advice"""
-        # Exclude factual patterns that might match opinionated keywords
-        factual_exclusions = [
-            'how to download', 'download statements', 'download capital',
-            'description of', 'overview of', 'meaning of', 'what is the meaning'
-        ]
-        
         # If it's a factual pattern, don't mark as opinionated
-        for exclusion in factual_exclusions:
-            if exclusion in query_lower:
-                return False
-        
-        # Check for keyword matches
-        for keyword in self.OPINIONATED_KEYWORDS:
-            if keyword in query_lower:
-                return True
-        
-        # Check for comparison patterns
-        comparison_patterns = [
-            r'which.*better',
-            r'which.*best',
-            r'which.*worse',
-            r'compare.*fund',
-            r'better.*than',
-            r'worse.*than'
-        ]
-        
-        for pattern in comparison_patterns:
-            if re.search(pattern, query_lower):
-                return True
+        if self._FACTUAL_EXCLUSIONS_RE.search(query_lower):
+            return False
         
-        return False
+        # Check for keyword matches, then comparison patterns
+        return bool(self._OPINIONATED_RE.search(query_lower)
+                    or self._COMPARISON_RE.search(query_lower))
     
     def _detect_pii(self, query: str) -> Dict[str, Any]:
         """Detect PII in query"""
+        has_otp = self._contains_otp(query)
+        # Most queries contain no PII; only a hit needs the per-type breakdown
+        if not has_otp and not self._PII_ANY_RE.search(query):
+            return None
+        
         detected = {}
         
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            if matches:
+        for pii_type, pattern in self._PII_RES.items():
+            if pattern.search(query):
                 detected[pii_type] = True
+        if has_otp:
+            detected['otp'] = True
         
         return detected if detected else None
     
+    def _contains_otp(self, query: str) -> bool:
+        """
+        Same matches as r'\b\d{4,6}\b.*otp|\botp.*\b\d{4,6}\b' (case-insensitive),
+        in linear time: on each line, compare the first code or 'otp' with the
+        last occurrence of the other
+        
+        Args:
+            query: User's question
+            
+        Returns:
+            True if a line holds a 4-6 digit code before or after 'otp'
+        """
+        # Cheap exits: most queries never mention otp
+        if 'otp' not in query.lower():
+            return False
+        
+        # '.' doesn't cross newlines, so the regex only matched within a line
+        for line in query.split('\n'):
+            line_lower = line.lower()
+            last_otp = line_lower.rfind('otp')
+            if last_otp < 0:
+                continue
+            codes = list(self._OTP_CODE_RE.finditer(line))
+            if not codes:
+                continue
+            # Code, then 'otp' anywhere after it
+            if codes[0].end() <= last_otp:
+                return True
+            # Word-initial 'otp', then a code after it
+            first_word = self._OTP_WORD_RE.search(line)
+            if first_word and first_word.end() <= codes[-1].start():
+                return True
+        return False
+    
     def _get_rejection_reason(self, is_factual: bool, is_opinionated: bool, pii_detected: Any) -> str:
         """Get reason for query rejection"""
         if pii_detected:
@@ -2,9 +2,15 @@
 RAG Pipeline - Main orchestrator for Retrieval-Augmented Generation
 """
 import json
+import hashlib
+import heapq
+import threading
+import time
 import urllib.request
 import urllib.error
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from operator import itemgetter
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from pathlib import Path
 import logging
 
@@ -12,7 +18,7 @@ from .document_processor import DocumentProcessor
 from .embedding_store import EmbeddingStore
 from .query_classifier import QueryClassifier
 from .response_formatter import ResponseFormatter
-from ..llm.gemini_client import GeminiClient
+from ..llm.gemini_client import GeminiClient, GeminiKeyMissingError
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +26,11 @@ logger = logging.getLogger(__name__)
 class RAGPipeline:
     """Main RAG pipeline for question answering"""
     
+    # Max prompt -> answer pairs kept in memory (least recently used evicted)
+    ANSWER_CACHE_SIZE = 512
+    # Seconds a cached answer stays valid (matches the API's QueryCache ttl)
+    ANSWER_CACHE_TTL = 3600.0
+    
     def __init__(self, data_dir: str = "data/scraped", embeddings_dir: str = "data/embeddings"):
         """
         Initialize RAG pipeline
@@ -36,6 +47,11 @@ class RAGPipeline:
         self.response_formatter = ResponseFormatter()
         
         self.chunks = []
+        self._available_funds: Optional[List[str]] = None
+        # prompt hash -> (created_at, answer)
+        self._answer_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # Queries run on API worker threads; guards the LRU bookkeeping
+        self._answer_lock = threading.Lock()
         self._initialize_chunks()
     
     def _initialize_chunks(self):
@@ -44,6 +60,7 @@ class RAGPipeline:
         
         # Process all funds into chunks
         self.chunks = self.document_processor.process_all_funds(self.data_dir)
+        self._available_funds = None  # Chunks changed, recompute fund list on demand
         
         # Generate embeddings for all chunks
         logger.info(f"Generating embeddings for {len(self.chunks)} chunks...")
@@ -56,7 +73,23 @@ class RAGPipeline:
         
         logger.info(f"RAG pipeline initialized with {len(self.chunks)} chunks")
     
-    def query(self, question: str, fund_name: Optional[str] = None, top_k: int = 3) -> Dict[str, Any]:
+    def warm_up(self, question: str = "What is the expense ratio of HDFC Flexi Cap Fund?"):
+        """
+        Run the local retrieval path once (classification, embedding, hybrid search)
+        and build the fund list, so the first real request doesn't pay first-call
+        costs. Makes no LLM call.
+        
+        Args:
+            question: Sample question to run through retrieval
+        """
+        self.query_classifier.classify_query(question)
+        query_embedding = self.embedding_store.generate_embedding(question)
+        self._hybrid_search(question, query_embedding, self.chunks, top_k=1)
+        self.list_available_funds()
+        logger.info("RAG pipeline warm-up complete")
+    
+    def query(self, question: str, fund_name: Optional[str] = None, top_k: int = 3,
+              on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Answer a question using RAG pipeline with constraints
         
@@ -64,11 +97,13 @@ class RAGPipeline:
             question: User's question
             fund_name: Optional specific fund to search in
             top_k: Number of relevant chunks to retrieve
+            on_delta: Optional callback receiving answer text as Gemini streams it
+                (the returned answer is still the complete, formatted one)
             
         Returns:
             Dictionary with answer and metadata
         """
-        logger.info(f"Processing query: {question}")
+        logger.info("Processing query: %s", question)
         
         # Check if it's a greeting first (before classification)
         query_lower = question.lower().strip()
@@ -81,7 +116,7 @@ class RAGPipeline:
         if is_greeting:
             logger.info("Detected greeting, generating friendly response")
             # Let LLM handle greetings with a simple context
-            answer = self._generate_answer(question, "This is a greeting or general conversation. Respond politely and offer help.")
+            answer = self._generate_answer(question, "This is a greeting or general conversation. Respond politely and offer help.", on_delta)
             formatted = self.response_formatter.format_answer(
                 answer,
                 [],
@@ -100,7 +135,7 @@ class RAGPipeline:
         classification = self.query_classifier.classify_query(question)
         
         # Check if it's a general finance question
-        is_general_finance = self.query_classifier.is_general_finance_question(question)
+        is_general_finance = classification['is_general_finance']
         
         # If query should be rejected, return rejection message
         if not classification['can_answer']:
@@ -194,16 +229,10 @@ class RAGPipeline:
         ])
         
         # Generate answer using Gemini with constraints
-        answer = self._generate_answer(question, context_text)
+        answer = self._generate_answer(question, context_text, on_delta)
         
         # Check if answer is an error message (rate limit, API errors, etc.)
-        is_error_message = any(keyword in answer.lower() for keyword in [
-            'error', 'encountered an error', 'experiencing high traffic', 
-            'temporarily unavailable', 'rate limit', 'quota limit', 
-            'api is currently', 'please wait a moment'
-        ])
-        
-        if is_error_message:
+        if self.is_error_answer(answer):
             # For error messages, don't include citation_link or timestamp
             return {
                 'answer': answer,
@@ -235,6 +264,24 @@ class RAGPipeline:
             'timestamp': formatted['timestamp']
         }
     
+    @staticmethod
+    def is_error_answer(answer: str) -> bool:
+        """
+        Check if a generated answer is an error message (rate limit, API errors, etc.)
+        
+        Args:
+            answer: Answer text
+            
+        Returns:
+            True if the answer reports an error instead of answering
+        """
+        answer_lower = answer.lower()
+        return any(keyword in answer_lower for keyword in [
+            'error', 'encountered an error', 'experiencing high traffic', 
+            'temporarily unavailable', 'rate limit', 'quota limit', 
+            'api is currently', 'please wait a moment'
+        ])
+    
     def _generate_general_finance_answer(self, question: str) -> str:
         """
         Generate answer for general finance questions using LLM's general knowledge
@@ -270,26 +317,8 @@ Instructions:
 Answer:"""
         
         try:
-            # Use Gemini to generate answer
-            data = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }]
-            }
-            import urllib.request
-            import json as json_lib
-            
-            json_data = json_lib.dumps(data).encode('utf-8')
-            api_url = f"{self.gemini_client.api_url}?key={self.gemini_client.api_key}"
-            
-            req = urllib.request.Request(
-                api_url,
-                data=json_data,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            with urllib.request.urlopen(req) as response:
-                result = json_lib.loads(response.read().decode('utf-8'))
+            # Use Gemini to generate answer (pooled connection, retries on 429)
+            result = self.gemini_client._make_api_request_with_retry(prompt)
             
             if 'candidates' in result and len(result['candidates']) > 0:
                 answer = result['candidates'][0]['content']['parts'][0]['text'].strip()
@@ -301,13 +330,15 @@ Answer:"""
             logger.error(f"Error generating general finance answer: {e}")
             return f"Error generating answer: {str(e)}"
     
-    def _generate_answer(self, question: str, context: str) -> str:
+    def _generate_answer(self, question: str, context: str,
+                         on_delta: Optional[Callable[[str], None]] = None) -> str:
         """
         Generate answer using Gemini with retrieved context and constraints
         
         Args:
             question: User's question
             context: Retrieved context from chunks
+            on_delta: Optional callback receiving answer text as it streams
             
         Returns:
             Generated answer
@@ -364,13 +395,53 @@ Instructions:
 
 Answer:"""
 
+        # Retrieved context is static, so identical prompts (same question and
+        # same retrieved chunks) get the same answer; skip the Gemini round-trip
+        cache_key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+        with self._answer_lock:
+            entry = self._answer_cache.get(cache_key)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ANSWER_CACHE_TTL:
+                    self._answer_cache.move_to_end(cache_key)
+                    return entry[1]
+                del self._answer_cache[cache_key]
+        
+        # Not held across the Gemini call, so other questions aren't serialized
+        answer = self._request_answer(prompt, on_delta)
+        if not self.is_error_answer(answer):
+            with self._answer_lock:
+                self._answer_cache[cache_key] = (time.monotonic(), answer)
+                self._answer_cache.move_to_end(cache_key)
+                while len(self._answer_cache) > self.ANSWER_CACHE_SIZE:
+                    self._answer_cache.popitem(last=False)
+        return answer
+    
+    def _request_answer(self, prompt: str, on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Send an answer prompt to Gemini and map failures to user-facing messages
+        
+        Args:
+            prompt: Fully assembled prompt
+            on_delta: Optional callback; if given, the answer is streamed to it
+            
+        Returns:
+            Generated answer or a friendly error message
+        """
         try:
             # Validate API key before making request
             if not self.gemini_client.api_key:
-                raise ValueError("Gemini API key is not set")
+                raise GeminiKeyMissingError("Gemini API key is not set")
             
             logger.debug(f"Making Gemini API request to: {self.gemini_client.api_url.split('?')[0]}")
             
+            if on_delta is not None:
+                parts = []
+                for delta in self.gemini_client.stream_generate(prompt):
+                    parts.append(delta)
+                    on_delta(delta)
+                answer = "".join(parts).strip()
+                return answer or "I couldn't generate an answer. Please try rephrasing your question."
+            
             # Use the retry logic from GeminiClient
             result = self.gemini_client._make_api_request_with_retry(prompt)
             
@@ -498,7 +569,7 @@ Answer:"""
                 chunk['embedding'] = self.embedding_store.generate_embedding(chunk['text'])
             
             # Semantic similarity
-            semantic_sim = self.embedding_store.cosine_similarity(query_embedding, chunk['embedding'])
+            semantic_sim = self.embedding_store.dot_similarity(query_embedding, chunk['embedding'])
             
             # Keyword boost
             chunk_text_lower = chunk['text'].lower()
@@ -537,21 +608,22 @@ Answer:"""
                 'keyword_boost': keyword_boost
             })
         
-        # Sort by combined score
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:top_k]
+        # Only the top_k results need ordering (same result as a full stable sort)
+        return heapq.nlargest(top_k, results, key=itemgetter('similarity'))
     
     def list_available_funds(self) -> List[str]:
         """
         List all funds available in the knowledge base
         
         Returns:
-            List of fund names
+            List of fund names (cached; chunks don't change after initialization)
         """
-        funds = set()
-        for chunk in self.chunks:
-            fund_name = chunk['metadata'].get('fund_name', '')
-            if fund_name:
-                funds.add(fund_name)
-        return sorted(list(funds))
+        if self._available_funds is None:
+            funds = set()
+            for chunk in self.chunks:
+                fund_name = chunk['metadata'].get('fund_name', '')
+                if fund_name:
+                    funds.add(fund_name)
+            self._available_funds = sorted(funds)
+        return self._available_funds
 
@@ -1,6 +1,7 @@
 """
 Intelligent Data Extractor using Gemini LLM
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 import logging
 
@@ -21,14 +22,20 @@ except ImportError:
 class DataExtractor:
     """Orchestrates data extraction from multiple sources with intelligent parsing"""
     
-    def __init__(self, gemini_api_key: str = None):
+    def __init__(self, gemini_api_key: str = None, max_workers: int = 4,
+                 extraction_cache_path: str = "data/cache/gemini_extractions.json"):
         """
         Initialize data extractor
         
         Args:
             gemini_api_key: Optional Gemini API key
+            max_workers: Sources scraped and extracted concurrently per fund (keep
+                within the Gemini per-minute quota; 429s are retried with backoff)
+            extraction_cache_path: File caching Gemini extractions across runs, so
+                re-scraping unchanged documents costs no API calls (None disables)
         """
-        self.gemini_client = GeminiClient(gemini_api_key)
+        self.gemini_client = GeminiClient(gemini_api_key, extraction_cache_path=extraction_cache_path)
+        self.max_workers = max_workers
         self.pdf_scraper = PDFScraper()
         self.html_scraper = HTMLScraper()
         self.sebi_scraper = SEBIScraper()
@@ -139,24 +146,23 @@ class DataExtractor:
         """
         logger.info(f"Extracting data from all sources for: {fund_name}")
         
-        all_extracted_data = []
-        
-        # Process each source
-        for source_name, url in fund_sources.items():
+        def extract_source(source_name: str, url: str) -> Dict[str, Any]:
             try:
                 if "sebi" in source_name.lower():
-                    data = self.extract_from_sebi(url)
+                    return self.extract_from_sebi(url)
                 elif url.endswith(".pdf") or "pdf" in source_name.lower():
-                    data = self.extract_from_pdf(url, source_name)
+                    return self.extract_from_pdf(url, source_name)
                 else:
-                    data = self.extract_from_html(url, source_name)
-                
-                if data:
-                    all_extracted_data.append(data)
-                    
+                    return self.extract_from_html(url, source_name)
             except Exception as e:
                 logger.error(f"Error extracting from {source_name} ({url}): {e}")
-                continue
+                return {}
+        
+        # Process sources concurrently (each is network-bound: download + Gemini
+        # call); map() keeps source order, which the merge uses for priority
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda item: extract_source(*item), fund_sources.items())
+            all_extracted_data = [data for data in results if data]
         
         # Merge all extracted data
         merged_data = self._merge_extracted_data(all_extracted_data, fund_name)
@@ -98,11 +98,35 @@ function LoadingBubble() {
     );
 }
 
+// Read a server-sent event stream, calling onEvent(eventName, data) for each event
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+            let eventName = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (data) onEvent(eventName, JSON.parse(data));
+        }
+    }
+}
+
 // Main Chat Component
 function ChatApp() {
     const [messages, setMessages] = useState([]);
     const [inputValue, setInputValue] = useState('');
     const [isLoading, setIsLoading] = useState(false);
+    const [isStreaming, setIsStreaming] = useState(false);
     const messagesEndRef = useRef(null);
     const inputRef = useRef(null);
 
@@ -127,10 +151,11 @@ function ChatApp() {
         setMessages(prev => [...prev, { text: question, isUser: true }]);
         setInputValue('');
         setIsLoading(true);
+        let streamingStarted = false;
 
         try {
-            // Call API
-            const response = await fetch(`${API_BASE_URL}/api/query`, {
+            // Call API; the answer streams back as server-sent events
+            const response = await fetch(`${API_BASE_URL}/api/query/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -138,19 +163,61 @@ function ChatApp() {
                 body: JSON.stringify({ question: question }),
             });
 
-            if (!response.ok) {
-                throw new Error('API request failed');
+            let data = null;
+            let sawEvent = false;
+            if (response.ok && response.body) {
+                await readEventStream(response, (eventName, payload) => {
+                    sawEvent = true;
+                    if (eventName === 'error') {
+                        throw new Error(payload.detail || 'API request failed');
+                    }
+                    if (eventName === 'done') {
+                        data = payload;
+                        return;
+                    }
+                    // Grow the assistant bubble as text arrives
+                    if (!streamingStarted) {
+                        streamingStarted = true;
+                        setIsStreaming(true);
+                        setMessages(prev => [...prev, { text: payload.delta, isUser: false }]);
+                    } else {
+                        setMessages(prev => [...prev.slice(0, -1), {
+                            ...prev[prev.length - 1],
+                            text: prev[prev.length - 1].text + payload.delta
+                        }]);
+                    }
+                });
             }
+            if (!sawEvent) {
+                // No events (stream endpoint failed, or a proxy buffered the
+                // response away): ask the plain endpoint instead
+                const fallback = await fetch(`${API_BASE_URL}/api/query`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ question: question }),
+                });
 
-            const data = await response.json();
+                if (!fallback.ok) {
+                    throw new Error('API request failed');
+                }
+                data = await fallback.json();
+            }
+            if (!data) {
+                throw new Error('API request failed');
+            }
             
-            // Add assistant response
-            setMessages(prev => [...prev, { 
+            // Replace the streamed text with the final formatted answer
+            const assistantMessage = { 
                 text: data.answer, 
                 isUser: false,
                 source: data.citation_link || null,
                 timestamp: data.timestamp || null
-            }]);
+            };
+            setMessages(prev => streamingStarted
+                ? [...prev.slice(0, -1), assistantMessage]
+                : [...prev, assistantMessage]);
         } catch (error) {
             console.error('Error:', error);
             let errorMessage = 'Sorry, I encountered an error. Please try again later.';
@@ -164,12 +231,13 @@ function ChatApp() {
                 errorMessage = 'Server error. Please try again later.';
             }
             
-            setMessages(prev => [...prev, { 
+            setMessages(prev => [...(streamingStarted ? prev.slice(0, -1) : prev), { 
                 text: errorMessage, 
                 isUser: false 
             }]);
         } finally {
             setIsLoading(false);
+            setIsStreaming(false);
         }
     };
 
@@ -205,7 +273,7 @@ function ChatApp() {
                                 timestamp={msg.timestamp}
                             />
                         ))}
-                        {isLoading && <LoadingBubble />}
+                        {isLoading && !isStreaming && <LoadingBubble />}
                         <div ref={messagesEndRef} />
                     </>
                 )}
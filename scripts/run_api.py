@@ -1,7 +1,9 @@
 """
 Run the FastAPI server
 """
+import os
 import sys
+import importlib.util
 from pathlib import Path
 
 # Add parent directory to path
@@ -11,17 +13,36 @@ try:
     import uvicorn
 except ImportError:
     print("Error: uvicorn not installed")
-    print("Please install: pip install uvicorn")
+    print("Please install: pip install 'uvicorn[standard]'")
     sys.exit(1)
 
+# uvloop (libuv event loop) and httptools (C HTTP parser) come with
+# uvicorn[standard]; fall back to asyncio/h11 if they're missing
+HAS_UVLOOP = importlib.util.find_spec("uvloop") is not None
+HAS_HTTPTOOLS = importlib.util.find_spec("httptools") is not None
+
+# WEB_CONCURRENCY > 1 runs that many worker processes without auto-reload
+# (production); "auto" uses 2 * cores + 1. Each worker loads its own pipeline.
+# Workers are spawned rather than forked from a preloaded app, because main.py
+# starts threads (log listener, RAG executor) at import that don't survive fork.
+_web_concurrency = os.getenv("WEB_CONCURRENCY", "1")
+WORKERS = 2 * (os.cpu_count() or 1) + 1 if _web_concurrency == "auto" else int(_web_concurrency)
+
 if __name__ == "__main__":
+    if not (HAS_UVLOOP and HAS_HTTPTOOLS):
+        print("Warning: uvloop/httptools not installed, using slower asyncio/h11")
+        print("Install with: pip install 'uvicorn[standard]'")
+    
     # Run the API server
     uvicorn.run(
         "backend.api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,  # Auto-reload on code changes
+        reload=WORKERS == 1,  # Auto-reload on code changes (dev only)
+        workers=WORKERS,
+        timeout_keep_alive=75,  # Reuse connections across requests behind a proxy
+        loop="uvloop" if HAS_UVLOOP else "asyncio",
+        http="httptools" if HAS_HTTPTOOLS else "h11",
         log_level="info"
     )
 
-
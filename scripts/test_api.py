@@ -66,6 +66,22 @@ def test_query_post():
         print()
 
 
+def test_frontend_html():
+    """Test that the served page keeps the SSE event splitters intact"""
+    print("Testing / ...")
+    response = requests.get(f"{API_BASE_URL}/")
+    print(f"Status: {response.status_code}")
+    html = response.text
+    # The stream reader splits on real newlines; a doubled backslash here means
+    # the page can never parse an event from /api/query/stream
+    # (quote style varies between the Babel and esbuild-minified builds)
+    has_splitter = '\\n\\n' in html
+    print(f"Event splitter present: {has_splitter}")
+    if '\\\\n' in html:
+        print("Error: doubled backslash in served HTML, stream events won't parse")
+    print()
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -92,6 +108,7 @@ def main():
     
     # Run tests
     test_health()
+    test_frontend_html()
     test_list_schemes()
     test_query_simple()
     test_query_post()
@@ -34,6 +34,7 @@ def test_query_classifier():
         ("Compare returns of HDFC funds", "opinionated"),
         ("My PAN is ABCDE1234F", "pii"),
         ("My phone number is 9876543210", "pii"),
+        ("I got an OTP on my registered mobile while redeeming HDFC ELSS units, it says 482913. What is the exit load?", "pii"),
         ("What is the lock-in period for ELSS?", "factual"),
         ("Is HDFC fund good for investment?", "opinionated"),
     ]